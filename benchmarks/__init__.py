@@ -0,0 +1,5 @@
+"""
+Benchmarks of verstak on synthetic docx documents
+
+python -m benchmarks --help
+"""
@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+
+import docx
+
+from verstak_parser import VDocument, get_typograf_cache
+from .generate import SIZES, generate
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden.json")
+# flags of conversions which are checked by golden outputs
+GOLDEN_FLAGS = {
+    "typograf": {"tipograf_enabled": True, "allow_header_links": False},
+    "plain": {"tipograf_enabled": False, "allow_header_links": True},
+}
+
+
+def best_time(function, repeat: int, prepare=None) -> float:
+    """
+    Get the best time of function
+    :param function: function to measure, it gets result of prepare if it is set
+    :param repeat: number of measurements
+    :param prepare: function which makes argument for every measurement, it is not measured
+    :return: the best time in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        argument = prepare() if prepare is not None else None
+        start = time.perf_counter()
+        function(argument) if prepare is not None else function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def parsed(path: str, tipograf_enabled: bool = False) -> VDocument:
+    """
+    Get parsed document
+    :param path: path to docx file
+    :param tipograf_enabled: rework text by rules from typograph
+    :return: parsed document
+    """
+    document = VDocument.from_file(path)
+    if tipograf_enabled:
+        document.do_typograf()
+    return document
+
+
+def uncached(path: str, tipograf_enabled: bool = False) -> VDocument:
+    """
+    Get parsed document and drop cached results of tipograf
+    :param path: path to docx file
+    :param tipograf_enabled: rework text by rules from typograph
+    :return: parsed document
+    """
+    document = parsed(path, tipograf_enabled)
+    get_typograf_cache().clear()
+    return document
+
+
+def measure(path: str, repeat: int) -> list:
+    """
+    Measure stages of conversion of docx file
+    :param path: path to docx file
+    :param repeat: number of measurements of every stage, the best one is reported
+    :return: list of (stage, seconds)
+    """
+    html_path = f"{path}.html"
+    stages = [
+        ("from_file", best_time(lambda: VDocument.from_file(path), repeat)),
+        ("from_file --stream", best_time(lambda: VDocument.from_file(path, streaming=True), repeat)),
+        ("docx.Document", best_time(lambda: docx.Document(path), repeat)),
+        ("parse", best_time(lambda document: VDocument(document), repeat, lambda: docx.Document(path))),
+        ("do_typograf", best_time(lambda document: document.do_typograf(), repeat, lambda: uncached(path))),
+        ("do_typograf cached", best_time(lambda document: document.do_typograf(), repeat, lambda: parsed(path))),
+        ("to_html", best_time(lambda document: document.to_html(), repeat, lambda: parsed(path, True))),
+        ("store_html", best_time(lambda document: document.store_html(html_path), repeat,
+                                 lambda: parsed(path, True))),
+    ]
+    os.remove(html_path)
+    return stages
+
+
+def html_digest(path: str, streaming: bool, tipograf_enabled: bool, allow_header_links: bool) -> str:
+    """
+    Get hash of html of docx file
+    :param path: path to docx file
+    :param streaming: stream the body of the document
+    :param tipograf_enabled: rework text by rules from typograph
+    :param allow_header_links: allows links to be added for headers/titles
+    :return: sha256 of html
+    """
+    document = VDocument.from_file(path, streaming=streaming, keep_raw=False)
+    if tipograf_enabled:
+        document.do_typograf()
+    return hashlib.sha256(document.to_html(allow_header_links=allow_header_links).encode("utf-8")).hexdigest()
+
+
+def check_golden(directory: str, update: bool = False) -> int:
+    """
+    Compare html of generated documents with golden hashes
+    :param directory: directory for generated documents
+    :param update: store current hashes as golden ones
+    :return: number of mismatched outputs
+    """
+    with open(GOLDEN_PATH) as golden_file:
+        golden = json.load(golden_file)
+    failed = 0
+    for name, case in golden["cases"].items():
+        path = f"{directory}{os.sep}golden-{name}.docx"
+        generate(path, case["seed"], **case["sizes"])
+        for flags_name, flags in GOLDEN_FLAGS.items():
+            digests = {html_digest(path, streaming, **flags) for streaming in [False, True]}
+            if update:
+                if len(digests) != 1:
+                    print(f"{name} {flags_name}: html of streaming differs, golden hash is not updated")
+                    failed += 1
+                    continue
+                case["html"][flags_name] = digests.pop()
+                print(f"{name} {flags_name}: updated")
+            elif digests == {case["html"].get(flags_name)}:
+                print(f"{name} {flags_name}: OK")
+            else:
+                print(f"{name} {flags_name}: FAILED, html differs from golden")
+                failed += 1
+    if update:
+        with open(GOLDEN_PATH, "w") as golden_file:
+            json.dump(golden, golden_file, indent=2, ensure_ascii=False)
+            golden_file.write("\n")
+    return failed
+
+
+def report(path: str, sizes: dict, stages: list):
+    """
+    Print measured stages with throughput
+    :param path: path to docx file
+    :param sizes: numbers of parts of the document
+    :param stages: list of (stage, seconds)
+    """
+    elements = len(docx.Document(path).element.body)
+    megabytes = os.path.getsize(path) / (1 << 20)
+    print(", ".join([f"{name}={number}" for name, number in sizes.items()]))
+    print(f"{elements} elements of body, {megabytes:.2f} MB of docx")
+    print(f"{'stage':<20}{'seconds':>10}{'elements/s':>14}{'MB/s':>10}")
+    for stage, seconds in stages:
+        print(f"{stage:<20}{seconds:>10.4f}{elements / seconds:>14.0f}{megabytes / seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Measure conversion of generated docx documents.")
+    parser.add_argument("--size", choices=list(SIZES.keys()), default="small",
+                        help="Preset numbers of parts of generated document")
+    for part in SIZES["small"].keys():
+        parser.add_argument(f"--{part.replace('_', '-')}", dest=part, type=int, default=None,
+                            help=f"Number of {part.replace('_', ' ')} instead of the preset one")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of random texts")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of measurements of every stage")
+    parser.add_argument("--keep", type=str, default=None,
+                        help="Directory to keep generated documents in")
+    parser.add_argument("--golden", action="store_true",
+                        help="Only check that html of golden documents is not changed")
+    parser.add_argument("--update-golden", dest="update_golden", action="store_true",
+                        help="Store hashes of html of golden documents")
+    args = parser.parse_args()
+    VDocument.SHOW_PROGRESS = False
+    with tempfile.TemporaryDirectory() as temp_dir:
+        directory = args.keep if args.keep is not None else temp_dir
+        os.makedirs(directory, exist_ok=True)
+        if args.golden or args.update_golden:
+            sys.exit(1 if check_golden(directory, args.update_golden) else 0)
+        sizes = {part: number if getattr(args, part) is None else getattr(args, part)
+                 for part, number in SIZES[args.size].items()}
+        path = f"{directory}{os.sep}{args.size}-{args.seed}.docx"
+        generate(path, args.seed, **sizes)
+        report(path, sizes, measure(path, args.repeat))
@@ -0,0 +1,230 @@
+import io
+import struct
+import random
+import zlib
+
+import docx
+from docx.shared import Inches
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.opc.constants import RELATIONSHIP_TYPE
+
+# words are chosen to trigger rules of tipograf
+WORDS = ("потому что так как обо мне вне контекста все равно про себя для себя что-нибудь из-за кота все-таки "
+         "т. д. т.п. 678 678,67 млн долларов 1,5—2 часа Как бы я хотел этого Во-первых, это во-вторых стр. 123 "
+         "The bar and for all 12 009 — 17 877 ₽ или мало 20:00, но текст 110, если 5 °C тоже ли же бы").split(" ")
+URLS = ["https://journal.tinkoff.ru/guide/", "https://example.com/a(b)", "https://example.org/"]
+
+# numbers of elements of generated documents
+SIZES = {
+    "small": {"paragraphs": 200, "headings": 20, "lists": 40, "hyperlinks": 40, "pictures": 5, "poles": 10,
+              "plashkas": 10, "big_tables": 5},
+    "medium": {"paragraphs": 2000, "headings": 200, "lists": 400, "hyperlinks": 400, "pictures": 50, "poles": 100,
+               "plashkas": 100, "big_tables": 50},
+    "large": {"paragraphs": 10000, "headings": 1000, "lists": 2000, "hyperlinks": 2000, "pictures": 250,
+              "poles": 500, "plashkas": 500, "big_tables": 250},
+}
+
+
+def png(color: tuple) -> bytes:
+    """
+    Make small png image
+    :param color: RGB color of the image
+    :return: content of png file
+    """
+    def chunk(chunk_type: bytes, data: bytes) -> bytes:
+        crc = zlib.crc32(chunk_type + data) & 0xffffffff
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+    pixels = b"".join([b"\x00" + bytes(color) * 4 for _ in range(4)])
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 4, 4, 8, 2, 0, 0, 0)) + \
+        chunk(b"IDAT", zlib.compress(pixels)) + chunk(b"IEND", b"")
+
+
+class Generator:
+    def __init__(self, seed: int = 0, big_table_rows: int = 10, big_table_columns: int = 4):
+        """
+        Generator of docx documents with parts which are recognized by verstak
+        :param seed: seed of random texts, documents of the same seed and sizes are the same
+        :param big_table_rows: number of rows in big tables
+        :param big_table_columns: number of columns in big tables
+        """
+        self.random = random.Random(seed)
+        self.big_table_rows = big_table_rows
+        self.big_table_columns = big_table_columns
+        self.images = [png((index * 80 % 255, 100, 200)) for index in range(3)]
+
+    def sentence(self, words: int = 0) -> str:
+        """
+        Make random text
+        :param words: number of words, random number by default
+        :return: text
+        """
+        return " ".join([self.random.choice(WORDS) for _ in range(words or self.random.randint(3, 25))])
+
+    @staticmethod
+    def add_hyperlink(paragraph, url: str, text: str):
+        """
+        Add hyperlink to the end of paragraph
+        :param paragraph: docx paragraph
+        :param url: target of hyperlink
+        :param text: text of hyperlink
+        """
+        hyperlink = OxmlElement("w:hyperlink")
+        hyperlink.set(qn("r:id"), paragraph.part.relate_to(url, RELATIONSHIP_TYPE.HYPERLINK, is_external=True))
+        run = OxmlElement("w:r")
+        text_element = OxmlElement("w:t")
+        text_element.text = text
+        text_element.set(qn("xml:space"), "preserve")
+        run.append(text_element)
+        hyperlink.append(run)
+        paragraph._p.append(hyperlink)
+
+    @staticmethod
+    def set_widths(table, widths: list):
+        """
+        Set widths of columns of table
+        :param table: docx table
+        :param widths: widths of columns
+        """
+        for grid_column, width in zip(table._tbl.tblGrid.gridCol_lst, widths):
+            grid_column.w = width
+
+    def fill_paragraph(self, paragraph, hyperlinks: int = 0):
+        """
+        Add runs of text, bold text and hyperlinks to paragraph
+        :param paragraph: docx paragraph
+        :param hyperlinks: number of hyperlinks in the paragraph
+        """
+        for _ in range(self.random.randint(1, 4)):
+            if self.random.random() < 0.25:
+                paragraph.add_run(self.sentence(4)).bold = True
+            else:
+                paragraph.add_run(f"{self.sentence()} ")
+        for _ in range(hyperlinks):
+            self.add_hyperlink(paragraph, self.random.choice(URLS), self.sentence(3))
+            paragraph.add_run(f" {self.sentence(5)}")
+
+    def add_list(self, document, items: int):
+        """
+        Add list to document
+        :param document: docx document
+        :param items: number of items
+        """
+        numeric = self.random.random() < 0.5
+        for _ in range(items):
+            paragraph = document.add_paragraph()
+            text = self.sentence()
+            paragraph.add_run(f"{text[0].upper()}{text[1:]}." if numeric else text)
+            numbering = paragraph._p.get_or_add_pPr().get_or_add_numPr()
+            numbering.get_or_add_ilvl().val = 0 if numeric else self.random.randint(0, 1)
+            numbering.get_or_add_numId().val = 1
+
+    def add_picture(self, document):
+        """
+        Add picture with caption to document
+        :param document: docx document
+        """
+        paragraph = document.add_paragraph()
+        paragraph.add_run().add_picture(io.BytesIO(self.random.choice(self.images)), width=Inches(0.3))
+        document.add_paragraph(self.sentence(6))
+
+    def add_pole(self, document):
+        """
+        Add table with remarks on the right side to document
+        :param document: docx document
+        """
+        table = document.add_table(rows=self.random.randint(1, 3), cols=2)
+        self.set_widths(table, [Inches(5), Inches(1.5)])
+        for row in table.rows:
+            row.cells[0].text = self.sentence(30)
+            if self.random.random() < 0.5:
+                row.cells[1].text = ""
+                self.add_hyperlink(row.cells[1].paragraphs[0], self.random.choice(URLS), self.sentence(2))
+            else:
+                row.cells[1].text = self.sentence(4)
+
+    def add_plashka(self, document):
+        """
+        Add table of one cell with title and paragraphs to document
+        :param document: docx document
+        """
+        cell = document.add_table(rows=1, cols=1).cell(0, 0)
+        cell.text = self.sentence(4)
+        for _ in range(self.random.randint(1, 4)):
+            self.fill_paragraph(cell.add_paragraph())
+
+    def add_big_table(self, document):
+        """
+        Add heading and big table to document
+        :param document: docx document
+        """
+        document.add_heading(self.sentence(4), 1)
+        table = document.add_table(rows=self.big_table_rows, cols=self.big_table_columns)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = self.sentence(4)
+        if self.big_table_rows > 2 and self.big_table_columns > 2:
+            table.cell(1, 0).merge(table.cell(1, 1))
+
+    def generate(self, path, paragraphs: int = 0, headings: int = 0, lists: int = 0, hyperlinks: int = 0,
+                 pictures: int = 0, poles: int = 0, plashkas: int = 0, big_tables: int = 0):
+        """
+        Generate docx document with parts in random order
+        :param path: path or file object for the document
+        :param paragraphs: number of paragraphs of text
+        :param headings: number of headings
+        :param lists: number of list items, items are grouped by 1-4 in lists
+        :param hyperlinks: number of hyperlinks in paragraphs of text
+        :param pictures: number of pictures with captions
+        :param poles: number of tables with remarks on the right side
+        :param plashkas: number of tables of one cell
+        :param big_tables: number of big tables with headings
+        """
+        parts = ["paragraph"] * paragraphs + ["heading"] * headings + ["picture"] * pictures + \
+            ["pole"] * poles + ["plashka"] * plashkas + ["big_table"] * big_tables
+        while lists > 0:
+            items = min(lists, self.random.randint(1, 4))
+            parts.append(items)
+            lists -= items
+        self.random.shuffle(parts)
+        links = [0] * max(paragraphs, 1)
+        for _ in range(hyperlinks):
+            links[self.random.randrange(len(links))] += 1
+
+        document = docx.Document()
+        document.add_table(rows=1, cols=1).cell(0, 0).text = "meta"  # the first table is skipped by verstak
+        document.add_heading(self.sentence(5), 0)
+        paragraph_index = 0
+        if paragraphs == 0 and hyperlinks > 0:
+            self.fill_paragraph(document.add_paragraph(), links[0])
+        for part in parts:
+            if type(part) == int:
+                self.add_list(document, part)
+            elif part == "paragraph":
+                self.fill_paragraph(document.add_paragraph(), links[paragraph_index])
+                paragraph_index += 1
+            elif part == "heading":
+                document.add_heading(self.sentence(self.random.choice([3, 8])), self.random.randint(1, 3))
+            elif part == "picture":
+                self.add_picture(document)
+            elif part == "pole":
+                self.add_pole(document)
+            elif part == "plashka":
+                self.add_plashka(document)
+            elif part == "big_table":
+                self.add_big_table(document)
+        # Word writes properties of every run and verstak relies on them
+        for run in document.element.body.iter(qn("w:r")):
+            run.get_or_add_rPr()
+        document.save(path)
+
+
+def generate(path, seed: int = 0, **sizes):
+    """
+    Generate docx document
+    :param path: path or file object for the document
+    :param seed: seed of random texts
+    :param sizes: numbers of parts of the document (see Generator.generate)
+    """
+    Generator(seed).generate(path, **sizes)
@@ -7,7 +7,7 @@ setup(name='verstak',
       description='Application for transformation of docx to html',
       author='Ivan Danilov',
       url='https://github.com/REW1L/verstak',
-      packages=find_packages(),
+      packages=find_packages(exclude=['benchmarks']),
       install_requires=['python-docx'],
-      scripts=['scripts/verstak'],
-      package_data={'': ['*.ini']})
+      scripts=['scripts/verstak', 'scripts/verstak-server'],
+      package_data={'': ['*.ini', 'front/*.html', 'front/*.css']})
@@ -1,10 +1,16 @@
-from docx.table import Table, _Row, _Cell
+from __future__ import annotations
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:  # docx is imported when the first document is parsed
+    from docx.table import Table
 
 from .VParagraph import VParagraph
 from .VBoldText import VBoldText
 
 
 class VBigTable:
+    __slots__ = ("title", "raw", "headers", "rows")
+
     MAX_WIDTH = 700
 
     def __init__(self, table: Table = None, title: str = ""):
@@ -15,46 +21,118 @@ class VBigTable:
         if table is not None:
             self.parse(self.raw)
 
+    def release_raw(self):
+        """
+        Release references to docx objects of the table and its cells
+        """
+        self.raw = None
+        for row in self.headers + self.rows:
+            for paragraph in row:
+                paragraph.release_raw()
+
     def __str__(self):
         return "## BIG TABLE"
 
-    def __parse_headers(self, row: _Row):
+    @staticmethod
+    def __grid_value(element, path: str, default: int) -> int:
+        """
+        Get integer w:val of child element
+        :param element: xml element
+        :param path: path of the child element with prefixes of namespaces (w:tcPr/w:gridSpan)
+        :param default: value if the child element is absent
+        :return: value of the child element
+        """
+        from docx.oxml.ns import qn
+        child = element.find("/".join([qn(tag) for tag in path.split("/")]))
+        if child is None:
+            return default
+        return int(child.get(qn("w:val"), default))
+
+    @staticmethod
+    def grid_rows(table: Table) -> Optional[list]:
+        """
+        Get cells of rows of table walking its w:tr and w:tc elements once
+        Cells are the same as docx.table._Row.cells gives: a cell is repeated for every grid column it spans
+        and a vertically merged cell is the cell where the merge starts
+        :param table: docx table
+        :return: list of rows with lists of w:tc elements or None if a vertical merge doesn't start above
+        """
+        from docx.oxml.ns import qn
+        rows = []
+        above = {}  # cells of the previous row by grid columns where they start
+        for tr in table._tbl.tr_lst:
+            column = VBigTable.__grid_value(tr, "w:trPr/w:gridBefore", 0)
+            cells = []
+            starts = {}
+            for tc in tr.iterchildren(qn("w:tc")):
+                cell = tc
+                merge = tc.find(f"{qn('w:tcPr')}/{qn('w:vMerge')}")
+                if merge is not None and merge.get(qn("w:val"), "continue") == "continue":
+                    if column not in above:
+                        return None
+                    cell = above[column]
+                starts[column] = cell
+                cells.extend([cell] * VBigTable.__grid_value(cell, "w:tcPr/w:gridSpan", 1))
+                column += VBigTable.__grid_value(tc, "w:tcPr/w:gridSpan", 1)
+            rows.append(cells)
+            above = starts
+        return rows
+
+    @staticmethod
+    def __parse_cells(table: Table, cells: list) -> list:
+        """
+        Parse paragraphs of cells
+        :param table: docx table of the cells
+        :param cells: w:tc elements of the cells
+        :return: list of VParagraph of every cell
+        """
+        from docx.table import _Cell
+        return [[VParagraph(paragraph) for paragraph in _Cell(cell, table).paragraphs] for cell in cells]
+
+    def __parse_headers(self, table: Table, cells: list):
         """
-        Fill headers with contents of docx.table._Row
-        :param row: array of docx.table._Row
+        Fill headers with contents of cells of the first row
+        :param table: docx table
+        :param cells: w:tc elements of the first row
         """
-        for cell in row.cells:
-            parts = []
-            for paragraph in cell.paragraphs:
-                parts.append(VParagraph(paragraph))
-            self.headers.append(parts)
+        self.headers.extend(self.__parse_cells(table, cells))
 
-    def __parse_rows(self, rows: list):
+    def __parse_rows(self, table: Table, rows: list):
         """
-        Fill rows with contents of docx.table._Row array
-        :param rows: array of docx.table._Row
+        Fill rows with contents of cells of rows
+        :param table: docx table
+        :param rows: list of rows with w:tc elements
         """
-        for row in rows:
-            row: _Row
+        for cells in rows:
             row_parts = []
-            for cell in row.cells:
-                cell: _Cell
-                for paragraph in cell.paragraphs:
-                    row_parts.append(VParagraph(paragraph))
+            for paragraphs in self.__parse_cells(table, cells):
+                row_parts.extend(paragraphs)
             self.rows.append(row_parts)
 
     def parse(self, table: Table):
         """
         Parse table to get headers and rows
         """
-        if len(table.rows) < 1:
+        rows = self.grid_rows(table)
+        if rows is None:  # python-docx raises its error for vertical merge without start
+            rows = [[cell._tc for cell in row.cells] for row in table.rows]
+        if len(rows) < 1:
             return
-        elif len(table.rows) == 1:
-            rows = table.rows
+        elif len(rows) == 1:
+            body = rows
         else:
-            self.__parse_headers(table.rows[0])
-            rows = table.rows[1:]
-        self.__parse_rows(rows)
+            self.__parse_headers(table, rows[0])
+            body = rows[1:]
+        self.__parse_rows(table, body)
+
+    def iter_html(self, skip: bool = False):
+        """
+        Get html representation by lines which are produced one by one
+        :param skip: get stub instead of table
+        :return: iterator over lines of html representation (new lines are included)
+        """
+        for index, line in enumerate(self.__html_lines(skip)):
+            yield line if index == 0 else f"\n{line}"
 
     def to_html(self, skip: bool = False):
         """
@@ -62,14 +140,23 @@ class VBigTable:
         :param skip: get stub instead of table
         :return: <p> with text BIG TABLE
         """
+        return "".join(self.iter_html(skip))
+
+    def __html_lines(self, skip: bool = False):
+        """
+        Get lines of html representation
+        :param skip: get stub instead of table
+        :return: iterator over lines of html representation
+        """
         if skip:
-            return f"<p>## BIG TABLE</p>"
-        html_table = ['<table class="desktop-table desktop-table--thead-with-border" style="width: '
-                      f'1px!important;">']
+            yield f"<p>## BIG TABLE</p>"
+            return
+        yield ('<table class="desktop-table desktop-table--thead-with-border" style="width: '
+               f'1px!important;">')
         if len(self.headers) != 0:
             col_width = int((self.MAX_WIDTH / len(self.headers)))
-            html_table.append('\t<thead>')
-            html_table.append('\t\t<tr>')
+            yield '\t<thead>'
+            yield '\t\t<tr>'
             for header in self.headers:
                 cell_html = []
                 for p in [h for h in header]:
@@ -77,19 +164,25 @@ class VBigTable:
                         cell_html.append(p.to_html())
                     else:
                         cell_html.append(p.text)
-                html_table.append(f'\t\t\t<th style="width: {col_width}px">{"".join(cell_html)}</th>')
-            html_table.append('\t\t</tr>')
-            html_table.append('\t</thead>')
-        html_table.append('\t<tbody>')
+                yield f'\t\t\t<th style="width: {col_width}px">{"".join(cell_html)}</th>'
+            yield '\t\t</tr>'
+            yield '\t</thead>'
+        yield '\t<tbody>'
         for row in self.rows:
-            html_table.append('\t\t<tr>')
+            yield '\t\t<tr>'
             for cell in row:
                 cell_html = [p.to_html() for p in [h for h in cell]]
-                html_table.append(f'\t\t\t<td>{"".join(cell_html)}</td>')
-            html_table.append('\t\t</tr>')
-        html_table.append('\t</tbody>')
-        html_table.append('</table>')
-        return "\n".join(html_table)
+                yield f'\t\t\t<td>{"".join(cell_html)}</td>'
+            yield '\t\t</tr>'
+        yield '\t</tbody>'
+        yield '</table>'
 
     def do_typograf(self):
         pass
+
+    def typograf_nodes(self) -> list:
+        """
+        Get text parts which are reworked by do_typograf
+        :return: empty list because text of big tables is not reworked
+        """
+        return []
@@ -1,9 +1,15 @@
-from docx.oxml.text.run import CT_R
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # docx is imported when the first document is parsed
+    from docx.oxml.text.run import CT_R
 
 from .VText import VText
 
 
 class VBoldText(VText):
+    __slots__ = ("bold",)
+
     def __init__(self, bold_text: CT_R = None):
         """
         Class for bold text
@@ -1,12 +1,7 @@
+from __future__ import annotations
+import io
 import os
-import docx
-from tqdm import tqdm
-from typing import Optional
-from docx.document import Document
-from docx.oxml.text.paragraph import CT_P
-from docx.oxml.table import CT_Tbl
-from docx.text.paragraph import Paragraph
-from docx.table import Table
+from typing import Optional, Union, Iterable, Iterator, BinaryIO, TextIO, TYPE_CHECKING
 
 from .VParagraph import VParagraph
 from .VText import VText
@@ -16,7 +11,19 @@ from .VListParagraph import VListParagraph
 from .VPlashka import VPlashka
 from .VBigTable import VBigTable
 
+if TYPE_CHECKING:  # docx is imported when the first document is parsed
+    from docx.document import Document
+    from docx.oxml.text.paragraph import CT_P
+    from docx.oxml.table import CT_Tbl
+
 class VDocument:
+    __slots__ = ("first_table", "first_title", "raw", "parts", "paragraphs_split", "typografed")
+
+    # show progress bar while parsing
+    SHOW_PROGRESS = True
+    # size of buffer for html which is written to a file
+    WRITE_BUFFER_SIZE = 1 << 16
+
     def __init__(self, document: Document = None):
         """
         Class for docx document
@@ -26,17 +33,41 @@ class VDocument:
         self.first_title = None
         self.raw = document
         self.parts = []
+        self.paragraphs_split = False
+        self.typografed = False
         if document is not None:
             self.parse(document)
 
+    def release_raw(self):
+        """
+        Release references to docx objects kept by the document and its parts
+        The document keeps only its own model after that and the docx tree can be freed
+        """
+        self.raw = None
+        for part in self.parts:
+            part.release_raw()
+        if self.first_table is not None:
+            self.first_table.release_raw()
+        if self.first_title:
+            self.first_title.release_raw()
+
+    def invalidate(self):
+        """
+        Drop values derived from texts of paragraphs of the document after the texts are changed
+        """
+        for part in self.parts:
+            if type(part) in (VParagraph, VTable):
+                part.invalidate()
+
     def __parse_paragraph(self, element: CT_P, document: Document, caption: bool) -> Optional[VParagraph]:
         """
         Parse CT_P element from docx document
         :param element: CT_P from document
-        :param document: current docx.document.Document object
+        :param document: current docx.document.Document object or DocxReader
         :param caption: parse CT_P as caption for picture
         :return: VParagraph or None if recognition is failed or caption is applied to previous parts
         """
+        from docx.text.paragraph import Paragraph
         paragraph = VParagraph(Paragraph(element, document))
         if not self.first_title and len(self.parts) > 0:  # first title is absent in document
             self.first_title = False
@@ -66,9 +97,10 @@ class VDocument:
         """
         Parse CT_Tbl from document and add VTabel to self.parts
         :param element: CT_Tbl from document
-        :param document: current docx.document.Document object
+        :param document: current docx.document.Document object or DocxReader
         :return: None
         """
+        from docx.table import Table
         if self.first_table is None:  # the first table in a document should be skipped
             self.first_table = VTable(Table(element, document))
             return None
@@ -86,11 +118,23 @@ class VDocument:
         :return: parts of the resulted document
         """
         self.raw = document
+        return self.parse_body(document.element.body, document)
+
+    def parse_body(self, body, parent) -> list:
+        """
+        Parse elements of docx document body
+        :param body: iterable of CT_P/CT_Tbl elements of the body
+        :param parent: parent for python-docx proxies of the elements (Document or DocxReader)
+        :return: parts of the resulted document
+        """
+        from tqdm import tqdm
+        from docx.oxml.text.paragraph import CT_P
+        from docx.oxml.table import CT_Tbl
         blank_line_caption_found = False
         caption = False
-        for elem in tqdm(document.element.body):
+        for elem in tqdm(body, disable=not self.SHOW_PROGRESS):
             if type(elem) == CT_P:
-                paragraph = self.__parse_paragraph(elem, self.raw, caption)
+                paragraph = self.__parse_paragraph(elem, parent, caption)
                 if paragraph is None:
                     caption = False
                 elif caption and str(paragraph).strip() == "" and not blank_line_caption_found:
@@ -103,50 +147,51 @@ class VDocument:
                 if paragraph is not None:
                     self.parts.append(paragraph)
             elif type(elem) == CT_Tbl:
-                self.__parse_table(elem, self.raw)
+                self.__parse_table(elem, parent)
             blank_line_caption_found = False
+        self.split_paragraphs()
         return self.parts
 
-    def __split_paragraphs(self):
+    def split_paragraphs(self):
         """
         Split paragraphs by new lines
+        Every text part with new lines ends a paragraph on each of them except the last one:
+        text before the last new line stays in the previous paragraph and the rest starts the next one.
+        It is done once at the end of parse_body, the following calls don't change the document.
         """
-        split_index = -1
-        for index in range(len(self.parts)):
-            if type(self.parts[index]) == VParagraph and self.parts[index].list_type is None:
-                if self.parts[index].find_new_lines() != -1:
-                    split_index = index
-                    break
-        if split_index != -1:
-            index = self.parts[split_index].find_new_lines()
-            if len(self.parts[split_index].parts) == index - 1:
-                return
-            new_texts = self.parts[split_index][index].text.split("\n")
-            first_paragraph = VParagraph()
-            first_paragraph.parts = self.parts[split_index][:index]
-            second_paragraph = VParagraph()
-            second_paragraph.parts = self.parts[split_index][index:]
-            first_paragraph.parts.extend([VText(x) for x in new_texts[:-1]])
-            second_paragraph.parts[0] = VText(new_texts[-1])
-            parts = self.parts[:split_index]
-            parts.append(first_paragraph)
-            parts.append(second_paragraph)
-            if len(self.parts) > split_index + 1:
-                parts.extend(self.parts[split_index+1:])
-            self.parts = parts
-            self.__split_paragraphs()
+        if self.paragraphs_split:
+            return
+        self.paragraphs_split = True
+        parts = []
+        for part in self.parts:
+            if type(part) != VParagraph or part.list_type is not None or part.find_new_lines() == -1:
+                parts.append(part)
+                continue
+            paragraph_parts = []
+            for paragraph_part in part:
+                if paragraph_part.text.find("\n") == -1:
+                    paragraph_parts.append(paragraph_part)
+                    continue
+                new_texts = paragraph_part.text.split("\n")
+                paragraph_parts.extend([VText(x) for x in new_texts[:-1]])
+                paragraph = VParagraph()
+                paragraph.parts = paragraph_parts
+                parts.append(paragraph)
+                paragraph_parts = [VText(new_texts[-1])]
+            paragraph = VParagraph()
+            paragraph.parts = paragraph_parts
+            parts.append(paragraph)
+        self.parts = parts
 
-    def to_html(self, allow_header_links: bool = False, skip_tables: bool = False) -> str:
+    def __html_fragments(self, allow_header_links: bool = False, skip_tables: bool = False):
         """
-        Get html representation
+        Get html representation of the parts of the document by fragments
         :param allow_header_links: allows links to be added for headers/titles
         :param skip_tables: adds stub instead of big tables
-        :return: html representation
+        :return: iterator over (fragment, starts a new part of the document, the new part is a big table)
         """
-        html_parts = []
         is_list = False
         list_type = None
-        self.__split_paragraphs()
         for part in self.parts:
             if type(part) == VParagraph:
                 if part.text.strip() == "":
@@ -158,40 +203,100 @@ class VDocument:
                 if not is_list and part.list_type is not None:
                     list_type = part.list_type
                     is_list = True
-                    html_parts.append(f"{VListParagraph.type_to_html(list_type)}\n")
+                    yield f"{VListParagraph.type_to_html(list_type)}\n", True, False
                 elif is_list and part.list_type is None:
-                    html_parts[-1] += VListParagraph.type_to_html(list_type, False)
+                    yield VListParagraph.type_to_html(list_type, False), False, False
                     is_list = False
                 if is_list and part.list_type is not None:
-                    html_parts[-1] += f"{part.to_html()}\n"
+                    yield f"{part.to_html()}\n", False, False
                     continue
             elif is_list:
-                html_parts[-1] += VListParagraph.type_to_html(list_type, False)
+                yield VListParagraph.type_to_html(list_type, False), False, False
                 is_list = False
             if type(part) == VTable:
-                if part.type == VTable.TYPE.BIG_TABLE:
-                    # the table title should be h3 with class table-heading
-                    if len(html_parts) > 0 and html_parts[-1].startswith("<h2>"):
-                        html_parts[-1] = html_parts[-1].replace("<h2>", '<h3 class="table-heading">')
-                        html_parts[-1] = html_parts[-1].replace("</h2>", '</h3>')
-                    html_parts.append(part.to_html(skip_tables))
-                else:
-                    html_parts.append(part.to_html())
+                big_table = part.type == VTable.TYPE.BIG_TABLE
+                yield "", True, big_table
+                for fragment in part.iter_html(skip_tables if big_table else False):
+                    yield fragment, False, False
             elif type(part) in [VParagraph, VPlashka]:  # VPlashka has headers in it
-                html_parts.append(part.to_html(allow_header_links=allow_header_links))
+                yield part.to_html(allow_header_links=allow_header_links), True, False
             else:
-                html_parts.append(part.to_html())
+                yield part.to_html(), True, False
         if is_list:  # List can end at the end of the document so it should be closed
-            html_parts[-1] += VListParagraph.type_to_html(list_type, False)
-        return "\n\n".join(html_parts)  # it should be an empty line between parts of the document
+            yield VListParagraph.type_to_html(list_type, False), False, False
+
+    def iter_html(self, allow_header_links: bool = False, skip_tables: bool = False):
+        """
+        Get html representation by fragments which are produced one by one
+        :param allow_header_links: allows links to be added for headers/titles
+        :param skip_tables: adds stub instead of big tables
+        :return: iterator over fragments of html representation
+        """
+        separator = ""  # it should be an empty line between parts of the document
+        # a part which starts with <h2> is held because it becomes a heading if a big table follows it
+        entry = None
+        heading = False
+        for fragment, new_part, big_table in self.__html_fragments(allow_header_links, skip_tables):
+            if new_part:
+                if entry is not None:
+                    text = "".join(entry)
+                    if heading and big_table:  # the table title should be h3 with class table-heading
+                        text = text.replace("<h2>", '<h3 class="table-heading">').replace("</h2>", '</h3>')
+                    yield text
+                yield separator
+                separator = "\n\n"
+                entry = []
+                heading = False
+            if entry is None:
+                yield fragment
+                continue
+            entry.append(fragment)
+            if not heading:
+                text = "".join(entry)
+                if text.startswith("<h2>"):
+                    heading = True
+                    entry = [text]
+                elif len(text) >= len("<h2>"):
+                    yield text
+                    entry = None
+        if entry is not None:
+            yield "".join(entry)
+
+    def to_html(self, allow_header_links: bool = False, skip_tables: bool = False) -> str:
+        """
+        Get html representation
+        :param allow_header_links: allows links to be added for headers/titles
+        :param skip_tables: adds stub instead of big tables
+        :return: html representation
+        """
+        return "".join(self.iter_html(allow_header_links=allow_header_links, skip_tables=skip_tables))
 
-    def do_typograf(self):
+    def do_typograf(self, batched: bool = True):
         """
         Rework text by rules from typograph
+        :param batched: rework all texts of the document together in a few large passes
         """
+        self.typografed = True
+        if batched:
+            nodes = self.typograf_nodes()
+            # a part included twice would be reworked twice one by one
+            if len(set(id(node[0]) for node in nodes)) == len(nodes):
+                VText.do_typograf_batch(nodes)
+                self.invalidate()
+                return
         for part in self.parts:
             part.do_typograf()
 
+    def typograf_nodes(self) -> list:
+        """
+        Get text parts which are reworked by do_typograf
+        :return: list of (part, nobr_enabled, is picture caption)
+        """
+        nodes = []
+        for part in self.parts:
+            nodes.extend(part.typograf_nodes())
+        return nodes
+
     def store_html(self, path: str = f"html{os.sep}result.html", allow_header_links: bool = False,
                    skip_tables: bool = False):
         """
@@ -200,11 +305,21 @@ class VDocument:
         :param allow_header_links: allows links to be added for headers/titles
         :param skip_tables: adds stub instead of big tables
         """
-        with open(path, "w") as result_file:
-            result_file.write(self.to_html(allow_header_links=allow_header_links, skip_tables=skip_tables))
-            result_file.write("\n")
+        with open(path, "w", buffering=self.WRITE_BUFFER_SIZE) as result_file:
+            self.write_html(result_file, allow_header_links=allow_header_links, skip_tables=skip_tables)
             result_file.flush()
 
+    def write_html(self, result_file: TextIO, allow_header_links: bool = False, skip_tables: bool = False):
+        """
+        Write document with html structure to text file object, the same html is stored by store_html
+        :param result_file: text file object (io.StringIO, sys.stdout, opened file)
+        :param allow_header_links: allows links to be added for headers/titles
+        :param skip_tables: adds stub instead of big tables
+        """
+        for fragment in self.iter_html(allow_header_links=allow_header_links, skip_tables=skip_tables):
+            result_file.write(fragment)
+        result_file.write("\n")
+
     def store_markdown(self, path: str = f"markdown{os.sep}result.md"):
         """
         Store document as file with markdown structure
@@ -216,11 +331,99 @@ class VDocument:
             result_file.flush()
 
     @staticmethod
-    def from_file(doc_path: str):
+    def from_file(doc_path: str, streaming: bool = False, keep_raw: Optional[bool] = None):
         """
         Get VDocument from docx file
         :param doc_path: docx file path
+        :param streaming: stream the body of the document instead of building python-docx Document,
+                          elements of the body are released right after they are parsed
+        :param keep_raw: keep references to docx objects in the parts of the document,
+                         otherwise they are released after parsing (see release_raw),
+                         by default they are kept unless the body is streamed,
+                         kept elements of streamed body are not cleared, so streaming doesn't save memory then
         :return: resulted VDocument
         """
-        document: Document = docx.Document(doc_path)
-        return VDocument(document)
+        import docx
+        from .docx_reader import DocxReader
+        if keep_raw is None:
+            keep_raw = not streaming
+        if streaming:
+            document = VDocument()
+            with DocxReader(doc_path) as reader:
+                document.parse_body(reader.iter_body(clear=not keep_raw), reader)
+        else:
+            document = VDocument(docx.Document(doc_path))
+        if not keep_raw:
+            document.release_raw()
+        return document
+
+    def dump(self, target: Union[str, BinaryIO]):
+        """
+        Write parsed (and reworked by tipograf) document to compact binary file
+        The file is loaded by VDocument.load without docx file and python-docx
+        :param target: file path or binary file object
+        """
+        from .dump import dump
+        dump(self, target)
+
+    @staticmethod
+    def load(source: Union[str, BinaryIO]):
+        """
+        Get VDocument from file written by VDocument.dump
+        :param source: file path or binary file object
+        :return: document which is rendered like the dumped one
+        """
+        from .dump import load
+        return load(source)
+
+    @staticmethod
+    def from_stream(stream: BinaryIO, streaming: bool = False, keep_raw: Optional[bool] = None):
+        """
+        Get VDocument from binary file object with docx content
+        :param stream: binary file object, streams which can't seek (pipes, sockets) are read into memory
+        :param streaming: stream the body of the document (see from_file)
+        :param keep_raw: keep references to docx objects in the parts of the document (see from_file)
+        :return: resulted VDocument
+        """
+        if not stream.seekable():  # docx is a zip archive which is read from its end
+            stream = io.BytesIO(stream.read())
+        return VDocument.from_file(stream, streaming=streaming, keep_raw=keep_raw)
+
+    @staticmethod
+    def from_bytes(data: bytes, streaming: bool = False, keep_raw: Optional[bool] = None):
+        """
+        Get VDocument from docx content
+        :param data: content of docx file
+        :param streaming: stream the body of the document (see from_file)
+        :param keep_raw: keep references to docx objects in the parts of the document (see from_file)
+        :return: resulted VDocument
+        """
+        return VDocument.from_file(io.BytesIO(data), streaming=streaming, keep_raw=keep_raw)
+
+    @staticmethod
+    def convert_many(sources: Iterable, tipograf_enabled: bool = True, allow_header_links: bool = False,
+                     skip_tables: bool = False, streaming: bool = True) -> Iterator[str]:
+        """
+        Convert docx documents to html one by one in the same process
+        Compiled rules of tipograf, its cached results and imported libraries are shared by all documents,
+        documents are converted only when their html is requested
+        :param sources: docx file paths, binary file objects or contents of docx files
+        :param tipograf_enabled: rework text by rules from typograph
+        :param allow_header_links: allows links to be added for headers/titles
+        :param skip_tables: adds stub instead of big tables
+        :param streaming: stream the body of the documents (see from_file)
+        :return: iterator over html of documents, the same html is stored by store_html
+        """
+        for source in sources:
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                document = VDocument.from_bytes(source, streaming=streaming, keep_raw=False)
+            elif hasattr(source, "read"):
+                document = VDocument.from_stream(source, streaming=streaming, keep_raw=False)
+            else:
+                document = VDocument.from_file(source, streaming=streaming, keep_raw=False)
+            if tipograf_enabled:
+                document.do_typograf()
+            html = io.StringIO()
+            document.write_html(html, allow_header_links=allow_header_links, skip_tables=skip_tables)
+            del document
+            yield html.getvalue()
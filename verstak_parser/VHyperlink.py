@@ -1,11 +1,17 @@
-from lxml.etree import _Element
-from docx.opc.rel import _Relationship
-from docx.text.paragraph import Paragraph
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # docx is imported when the first document is parsed
+    from lxml.etree import _Element
+    from docx.opc.rel import _Relationship
+    from docx.text.paragraph import Paragraph
 
 from .VText import VText
 
 
 class VHyperlink(VText):
+    __slots__ = ("url",)
+
     def __init__(self, hyperlink: _Element = None, paragraph: Paragraph = None):
         """
         Class for links in docx
@@ -1,12 +1,18 @@
+from __future__ import annotations
 from enum import Enum
-from docx.oxml.numbering import CT_NumPr
-from docx.oxml.text.parfmt import CT_PPr
-from docx.text.paragraph import Paragraph
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # docx is imported when the first document is parsed
+    from docx.oxml.numbering import CT_NumPr
+    from docx.oxml.text.parfmt import CT_PPr
+    from docx.text.paragraph import Paragraph
 
 from .VText import VText
 
 
 class VListParagraph(VText):
+    __slots__ = ("level", "type")
+
     class Type(Enum):
         NONE = 0
         NUMERIC = 1
@@ -1,9 +1,11 @@
+from __future__ import annotations
 import re
-from typing import Union, Optional
-from docx.oxml.text.run import CT_R
-from docx.oxml.text.font import CT_RPr
-from docx.oxml.text.parfmt import CT_PPr
-from docx.text.paragraph import Paragraph
+import weakref
+from typing import Union, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:  # docx is imported when the first document is parsed
+    from docx.oxml.text.run import CT_R
+    from docx.text.paragraph import Paragraph
 
 from .VPicture import VPicture
 from .VHyperlink import VHyperlink
@@ -11,15 +13,22 @@ from .VBoldText import VBoldText
 from .VText import VText
 from .VListParagraph import VListParagraph
 
+# names of paragraph styles by their ids for docx parts which are being parsed
+_style_names = weakref.WeakKeyDictionary()
+
 
 class VParagraph:
+    __slots__ = ("__parts", "raw", "title_enabled", "title", "title_level",
+                 "__structure", "__text", "__str", "__str_key")
+
     def __init__(self, paragraph: Paragraph = None, title: bool = True):
         """
         Class for paragraphs of text separated by new lines in docx
         :param paragraph: if provided immediately parses docx paragraph
         :param title: should the title be recognized by this paragraph
         """
-        self.parts = []
+        self.__parts = []
+        self.invalidate()
         self.raw: Paragraph = paragraph
         self.title_enabled = title
         self.title = False
@@ -27,26 +36,78 @@ class VParagraph:
         if paragraph is not None:
             self.parse(paragraph, title)
 
+    def release_raw(self):
+        """
+        Release references to docx objects of the paragraph and its parts
+        """
+        self.raw = None
+        for part in self.parts:
+            part.release_raw()
+
+    @property
+    def parts(self) -> list:
+        """
+        Parts of paragraph
+        The list should be changed with set_parts, append or paragraph[index] = part,
+        invalidate should be called after other changes of the list or texts of parts
+        :return: list of parts
+        """
+        return self.__parts
+
+    @parts.setter
+    def parts(self, parts: list):
+        self.set_parts(parts)
+
+    def set_parts(self, parts: list):
+        """
+        Replace parts of paragraph
+        :param parts: new list of parts
+        """
+        self.__parts = parts
+        self.invalidate()
+
+    def append(self, part):
+        """
+        Add part to the end of paragraph
+        :param part: part of paragraph
+        """
+        self.__parts.append(part)
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Drop values derived from parts, they are computed again when they are requested
+        """
+        self.__structure = None
+        self.__text = None
+        self.__str = None
+        self.__str_key = None
+
     def __len__(self):
-        return len(self.parts)
+        return len(self.__parts)
 
     def __str__(self):
+        key = (self.title, self.title_level)  # titles are set by the document after parsing
+        if self.__str is not None and key == self.__str_key:
+            return self.__str
         if self.title:
-            parts = [f'#{"#" * self.title_level} ']
-            parts.extend([x.text for x in self.parts])
-            return "".join(parts)
+            result = f'#{"#" * self.title_level} {self.text}'
         else:
-            parts = self.parts
-        return "".join([str(x) for x in parts])
+            result = "".join([str(x) for x in self.__parts])
+        if not self.is_picture():  # captions of pictures are not a part of the key
+            self.__str = result
+            self.__str_key = key
+        return result
 
     def __getitem__(self, item):
-        return self.parts[item]
+        return self.__parts[item]
 
     def __setitem__(self, key, value):
-        self.parts[key] = value
+        self.__parts[key] = value
+        self.invalidate()
 
     def __iter__(self):
-        return self.parts.__iter__()
+        return self.__parts.__iter__()
 
     def to_html(self, is_warning: bool = False, allow_header_links: bool = False) -> str:
         """
@@ -100,27 +161,25 @@ class VParagraph:
     def __enlarge_parts(self):
         """
         Merge parts of paragraph with the same type
+        Whitespace-only parts are merged into the previous part unless it is a link,
+        links are never merged this way
         :return: None
         """
-        if self.is_picture():
+        if self.is_picture() or len(self.parts) == 0:
             return
-        for index in range(1, len(self.parts)):
-            if type(self[index]) == VHyperlink:
-                continue
-            if type(self[index]) == type(self[index-1]):
-                alt_part_index = index
-                break
-            elif self[index].text.strip() == "" and type(self[index-1]) != VHyperlink:
-                alt_part_index = index
-                break
-        else:
-            return
-        head = self.parts[:alt_part_index]
-        head[-1].text = self[alt_part_index-1].text + self[alt_part_index].text
-        if len(self.parts) > alt_part_index:
-            head.extend(self.parts[alt_part_index+1:])
-        self.parts = head
-        self.__enlarge_parts()
+        parts = [self.parts[0]]
+        texts = [[self.parts[0].text]]
+        for part in self.parts[1:]:
+            if type(part) != VHyperlink and (type(part) == type(parts[-1]) or
+                                              (part.text.strip() == "" and type(parts[-1]) != VHyperlink)):
+                texts[-1].append(part.text)
+            else:
+                parts.append(part)
+                texts.append([part.text])
+        for part, part_texts in zip(parts, texts):
+            if len(part_texts) > 1:
+                part.text = "".join(part_texts)
+        self.parts = parts  # texts of parts are changed as well
 
     def do_typograf(self, nobr_enabled: bool = True):
         """
@@ -133,16 +192,45 @@ class VParagraph:
         for part in self:
             if type(part) != VListParagraph:
                 part.do_typograf(nobr_enabled)
+        self.invalidate()
+
+    def typograf_nodes(self, nobr_enabled: bool = True) -> list:
+        """
+        Get text parts which are reworked by do_typograf
+        invalidate should be called after texts of the parts are reworked
+        :param nobr_enabled: enable recognition of cases with [nobr][/nobr]
+        :return: list of (part, nobr_enabled, is picture caption)
+        """
+        if self.text.strip() == "":
+            return []
+        nodes = []
+        for part in self:
+            if type(part) != VListParagraph:
+                nodes.extend(part.typograf_nodes(nobr_enabled))
+        return nodes
+
+    def __get_structure(self) -> tuple:
+        """
+        Get values which depend only on the list of parts, they are computed once after the list is changed
+        :return: (paragraph has a picture inside, type of list or None)
+        """
+        if self.__structure is None:
+            picture = False
+            list_type = None
+            for part in self.__parts:
+                if type(part) == VPicture:
+                    picture = True
+                elif type(part) == VListParagraph and list_type is None:
+                    list_type = part.type
+            self.__structure = (picture, list_type)
+        return self.__structure
 
     def is_picture(self) -> bool:
         """
         Is this paragraph have a picture inside
         :return: True if picture is included False otherwise
         """
-        for part in self.parts:
-            if type(part) == VPicture:
-                return True
-        return False
+        return self.__get_structure()[0]
 
     def get_links_indexes(self):
         """
@@ -161,10 +249,7 @@ class VParagraph:
         Type of list
         :return: type of list if paragraph is a part of list and None otherwise
         """
-        for part in self.parts:
-            if type(part) == VListParagraph:
-                return part.type
-        return None
+        return self.__get_structure()[1]
 
     @property
     def text(self) -> str:
@@ -172,11 +257,23 @@ class VParagraph:
         Get raw text of paragraph
         :return: text without formatting
         """
-        text = ""
-        for part in self.parts:
-            text.replace("\n", "")
-            text += part.text
-        return text
+        if self.__text is None:
+            self.__text = "".join([part.text for part in self.__parts])
+        return self.__text
+
+    def __style_name(self) -> str:
+        """
+        Get name of style of current raw docx.Paragraph object
+        Names are cached for every docx part, python-docx looks through all styles for every paragraph
+        :return: name of the style like docx.Paragraph.style gives it
+        """
+        from docx.enum.style import WD_STYLE_TYPE
+        part = self.raw.part
+        style_id = self.raw._p.style
+        names = _style_names.setdefault(part, {})
+        if style_id not in names:
+            names[style_id] = part.get_style(style_id, WD_STYLE_TYPE.PARAGRAPH).name
+        return names[style_id]
 
     def __parse_title(self):
         """
@@ -185,12 +282,13 @@ class VParagraph:
         """
         if not self.title_enabled:
             return
-        if self.raw.style.name.lower().startswith("title"):
+        style_name = self.__style_name()
+        if style_name.lower().startswith("title"):
             self.title = True
             self.title_level = 0
-        elif self.raw.style.name.lower().startswith("heading "):
+        elif style_name.lower().startswith("heading "):
             self.title = True
-            heading_regexp = re.search("heading ([0-9]+)", self.raw.style.name.lower())
+            heading_regexp = re.search("heading ([0-9]+)", style_name.lower())
             if heading_regexp is not None and len(heading_regexp.groups()) > 0:
                 self.title_level = int(heading_regexp.group(1))
 
@@ -210,6 +308,7 @@ class VParagraph:
                 return False
         else:
             return False
+        self.invalidate()
         return True
 
     def __parse_run(self, run: CT_R) -> Union[VBoldText, VPicture, VText, None]:
@@ -218,6 +317,7 @@ class VParagraph:
         :param run: docx.oxml.text.run.CT_R object to parse
         :return: Parsed part of paragraph or None if parsing failed
         """
+        from docx.oxml.text.font import CT_RPr
         part = None
         if type(run[0]) == CT_RPr:
             if run[0].b is not None:
@@ -228,11 +328,11 @@ class VParagraph:
                 else:
                     part = VText(part.text)
             elif len([tag for tag in run if tag.tag.endswith("drawing")]) > 0:
-                part = VPicture(run)
+                part = VPicture(run, self.raw)
             else:
                 part = VText(run.text)
         elif len([x for x in run if x.tag.endswith("drawing")]) > 0:
-            part = VPicture(run)
+            part = VPicture(run, self.raw)
         return part
 
     def __merge_last_bold_text(self, bold_text: VBoldText) -> bool:
@@ -244,6 +344,7 @@ class VParagraph:
         """
         if len(self.parts) > 0 and type(self.parts[-1]) == VBoldText:
             self.parts[-1].text += bold_text.text
+            self.invalidate()
             return True
         return False
 
@@ -284,6 +385,8 @@ class VParagraph:
         :param title: allow title recognition
         :return: Markdown variation of VParagraph
         """
+        from docx.oxml.text.run import CT_R
+        from docx.oxml.text.parfmt import CT_PPr
         self.raw = paragraph
         self.title_enabled = title
         self.__parse_title()
@@ -302,7 +405,8 @@ class VParagraph:
                 if elem.text is not None:
                     part = VText(elem.text)
             if part is not None:
-                self.parts.append(part)
+                self.__parts.append(part)
+        self.invalidate()
         if self.is_picture():  # paragraphs with pictures can have text
             self.__move_text_to_caption()
         self.__enlarge_parts()
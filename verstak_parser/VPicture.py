@@ -1,8 +1,16 @@
-from docx.oxml.text.run import CT_R
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:  # docx is imported when the first document is parsed
+    from docx.oxml.text.run import CT_R
+    from docx.text.paragraph import Paragraph
+
 from .VText import VText
 from .VHyperlink import VHyperlink
 
 class VTextPicture(VText):
+    __slots__ = ()
 
     def __init__(self, text=""):
         """
@@ -17,19 +25,63 @@ class VTextPicture(VText):
         :param nobr_enabled: allow nobr additions
         :return: resulted text
         """
-        super(VTextPicture, self).do_typograf(nobr_enabled)
-        self.text = self.text.replace("[nobr]", "<nobr>")
-        self.text = self.text.replace("[/nobr]", "</nobr>")
+        self.text = self.typograf_text(self.glue, self.text, nobr_enabled, picture=True)
+        return self.text
 
 
 class VPicture:
-    def __init__(self, raw: CT_R = None):
+    __slots__ = ("caption", "raw", "src")
+
+    PLACEHOLDER = "placeholder1400"
+    # ImageStore for images of pictures, placeholder is used as source of pictures if it is not set,
+    # it should be set by use_image_store, so it doesn't stay for other conversions of the process
+    IMAGE_STORE = None
+
+    def __init__(self, raw: CT_R = None, paragraph: Paragraph = None):
         """
         Class for pictures in text
         :param raw: CT_R with picture
+        :param paragraph: paragraph with picture to get image while parsing
         """
         self.caption = []
         self.raw = raw
+        self.src = self.PLACEHOLDER
+        if raw is not None and paragraph is not None and self.IMAGE_STORE is not None:
+            self.extract(raw, paragraph, self.IMAGE_STORE)
+
+    @staticmethod
+    @contextmanager
+    def use_image_store(store: Optional[object]):
+        """
+        Write images of pictures which are parsed inside of the block to the store
+        The previous store is set back after the block
+        :param store: ImageStore for images or None to use placeholder
+        :return: the store
+        """
+        previous = VPicture.IMAGE_STORE
+        VPicture.IMAGE_STORE = store
+        try:
+            yield store
+        finally:
+            VPicture.IMAGE_STORE = previous
+
+    def extract(self, raw: CT_R, paragraph: Paragraph, store) -> str:
+        """
+        Store image of picture and use it as source of picture
+        :param raw: CT_R with picture
+        :param paragraph: paragraph with picture
+        :param store: ImageStore for image
+        :return: source of picture
+        """
+        from docx.oxml.ns import qn
+        related_parts = paragraph.part.related_parts
+        for blip in raw.iter(qn("a:blip")):
+            rId = blip.get(qn("r:embed"))
+            if rId is not None and rId in related_parts:
+                image = related_parts[rId]
+                self.src = store.add(image.blob, image.partname.ext)
+                break
+        return self.src
 
     @property
     def text(self):
@@ -39,10 +91,22 @@ class VPicture:
         """
         return str(self)
 
+    def release_raw(self):
+        """
+        Release references to docx elements of the picture and its caption
+        """
+        self.raw = None
+        if isinstance(self.caption, list):
+            for part in self.caption:
+                if type(part) != str:
+                    part.release_raw()
+        else:  # caption paragraph
+            self.caption.release_raw()
+
     def __str__(self):
         caption = "".join([str(x) for x in self.caption])
         caption = caption.replace("\n", "")
-        return f'[img src="placeholder1400" prop="" caption="{caption}"]'
+        return f'[img src="{self.src}" prop="" caption="{caption}"]'
 
     def to_html(self):
         """
@@ -51,7 +115,7 @@ class VPicture:
         """
         caption = "".join([x.to_html() for x in self.caption if type(x) != str])
         caption = caption.replace("\n", "")
-        return f'[img src="placeholder1400" prop="" caption="{caption}"]'
+        return f'[img src="{self.src}" prop="" caption="{caption}"]'
 
     def parse(self, caption: str = "") -> str:
         """
@@ -77,3 +141,16 @@ class VPicture:
             part.text = new_part.text
             self.caption[index] = part
         return self.text
+
+    def typograf_nodes(self, nobr_enabled: bool = True) -> list:
+        """
+        Get text parts of caption which are reworked by do_typograf
+        :param nobr_enabled: allow nobr additions
+        :return: list of (part, nobr_enabled, is picture caption)
+        """
+        nodes = []
+        for index in range(len(self.caption)):
+            if type(self.caption[index]) == str:
+                self.caption[index] = VText(self.caption[index])
+            nodes.append((self.caption[index], nobr_enabled, True))
+        return nodes
@@ -1,12 +1,15 @@
-from docx.oxml.table import CT_Tbl
-from docx.oxml.text.paragraph import CT_P
-from docx.text.paragraph import Paragraph
-from docx.table import Table, _Cell
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # docx is imported when the first document is parsed
+    from docx.table import _Cell
 
 import verstak_parser
 
 
 class VPlashka:
+    __slots__ = ("parts", "raw")
+
     def __init__(self, cell: _Cell = None):
         """
         Class for Plashka
@@ -17,6 +20,22 @@ class VPlashka:
         if cell is not None:
             self.parse(cell)
 
+    def release_raw(self):
+        """
+        Release references to docx objects of the Plashka and its parts
+        """
+        self.raw = None
+        for part in self.parts:
+            part.release_raw()
+
+    def invalidate(self):
+        """
+        Drop values derived from texts of paragraphs of the Plashka after the texts are changed
+        """
+        for part in self.parts:
+            if type(part) in (verstak_parser.VParagraph, verstak_parser.VPlashka, verstak_parser.VPole):
+                part.invalidate()
+
     def __getitem__(self, item):
         return self.parts[item]
 
@@ -33,25 +52,30 @@ class VPlashka:
         lines.append("```")
         return "\n".join(lines)
 
-    def to_html(self):
+    def iter_html(self):
         """
-        Get html representation
-        :return: html representation
+        Get html representation by fragments which are produced one by one
+        :return: iterator over fragments of html representation
         """
+        # the first paragraph with text is the title of Plashka
+        title = None
+        for part in self.parts:
+            if type(part) == verstak_parser.VParagraph and part.text.strip() != "":
+                title = part
+                break
+        if title is not None and len(title.text) <= 90:  # title should be less than 90 symbols
+            yield f'[hl title="{title.text}"]'
+        else:
+            yield '[hl]'
         is_list = False
-        html_parts = ['[hl]']
         list_type = None
-        first_title = True
         for part in self.parts:
             if type(part) == verstak_parser.VParagraph:
                 if part.text.strip() == "":
                     continue
-                if first_title:
-                    first_title = False
-                    if len(part.text) <= 90:  # title should be less than 90 symbols
-                        html_parts[0] = f'[hl title="{part.text}"]'
-                    else:
-                        html_parts.append(part.to_html(is_warning=True))
+                if part is title:
+                    if len(part.text) > 90:
+                        yield f"\n{part.to_html(is_warning=True)}"
                     continue
                 if part.title and str(part).strip() == "":
                     continue
@@ -62,21 +86,31 @@ class VPlashka:
                 if not is_list and part.list_type is not None:
                     list_type = part.list_type
                     is_list = True
-                    html_parts.append(f"{verstak_parser.VListParagraph.type_to_html(list_type)}\n")
+                    yield f"\n{verstak_parser.VListParagraph.type_to_html(list_type)}\n"
                 elif is_list and part.list_type is None:
-                    html_parts[-1] += verstak_parser.VListParagraph.type_to_html(list_type, False)
+                    yield verstak_parser.VListParagraph.type_to_html(list_type, False)
                     is_list = False
                 if is_list and part.list_type is not None:
-                    html_parts[-1] += f"{part.to_html()}\n"
+                    yield f"{part.to_html()}\n"
                     continue
             elif is_list:
-                html_parts[-1] += verstak_parser.VListParagraph.type_to_html(list_type, False)
+                yield verstak_parser.VListParagraph.type_to_html(list_type, False)
                 is_list = False
-            html_parts.append(part.to_html())
+            yield "\n"
+            if type(part) in [verstak_parser.VParagraph, verstak_parser.VText]:
+                yield part.to_html()
+            else:
+                yield from part.iter_html()
         if is_list:  # List can end at the end of the document so it should be closed
-            html_parts[-1] += verstak_parser.VListParagraph.type_to_html(list_type, False)
-        html_parts.append("[/hl]")
-        return "\n".join(html_parts)
+            yield verstak_parser.VListParagraph.type_to_html(list_type, False)
+        yield "\n[/hl]"
+
+    def to_html(self):
+        """
+        Get html representation
+        :return: html representation
+        """
+        return "".join(self.iter_html())
 
     def do_typograf(self):
         """
@@ -86,12 +120,26 @@ class VPlashka:
         for part in self:
             part.do_typograf()
 
+    def typograf_nodes(self) -> list:
+        """
+        Get text parts which are reworked by do_typograf
+        :return: list of (part, nobr_enabled, is picture caption)
+        """
+        nodes = []
+        for part in self:
+            nodes.extend(part.typograf_nodes())
+        return nodes
+
     def parse(self, cell: _Cell) -> []:
         """
         Parce cell of the Table with Plashka
         :param cell: cell of a table
         :return: resulted parts of the Plashka
         """
+        from docx.oxml.table import CT_Tbl
+        from docx.oxml.text.paragraph import CT_P
+        from docx.text.paragraph import Paragraph
+        from docx.table import Table
         for elem in cell._element:
             if type(elem) == CT_P:
                 self.parts.append(verstak_parser.VParagraph((Paragraph(elem, cell))))
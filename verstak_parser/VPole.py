@@ -1,15 +1,24 @@
+from __future__ import annotations
 import json
-from docx.table import Table, _Row, _Cell
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # docx is imported when the first document is parsed
+    from docx.table import Table, _Row, _Cell
 
 from .VParagraph import VParagraph
 from .VText import VText
 
 
 class VPole:
-    def __init__(self, row: _Row = None):
+    __slots__ = ("title", "left_parts", "right_parts", "url", "raw", "removed_parts")
+
+    JOURNAL_URL = "https://journal.tinkoff.ru"
+
+    def __init__(self, row: _Row = None, right: list = None):
         """
         Class for representation of Pole
         :param row: row of the table with pole
+        :param right: parsed paragraphs of the right cell of the row if they are already parsed
         """
         self.title = ""
         self.left_parts = []
@@ -18,7 +27,23 @@ class VPole:
         self.raw = row
         self.removed_parts = []
         if row is not None:
-            self.parse(row)
+            self.parse(row, right)
+
+    def release_raw(self):
+        """
+        Release references to docx objects of the Pole and its parts
+        """
+        self.raw = None
+        for part in self.left_parts + self.right_parts + self.removed_parts:
+            part.release_raw()
+
+    def invalidate(self):
+        """
+        Drop values derived from texts of paragraphs of the Pole after the texts are changed
+        """
+        for part in self.left_parts + self.right_parts:
+            if type(part) == VParagraph:
+                part.invalidate()
 
     def __dict__(self):
         d = {
@@ -39,27 +64,57 @@ class VPole:
         section.append("```")
         return "\n".join(section)
 
+    def iter_html(self):
+        """
+        Get html representation by lines which are produced one by one
+        :return: iterator over lines of html representation (new lines are included)
+        """
+        for index, line in enumerate(self.__html_lines()):
+            yield line if index == 0 else f"\n{line}"
+
     def to_html(self):
         """
         Get html representation
         :return: html representation
         """
+        return "".join(self.iter_html())
+
+    def __html_lines(self):
+        """
+        Get lines of html representation
+        :return: iterator over lines of html representation
+        """
         url = ""
         if self.url != "":
             # links to journal.tinkoff.ru should be cut
-            if self.url.startswith("https://journal.tinkoff.ru"):
-                url = f' ref="{self.url[27:]}"'
+            if self.url.startswith(self.JOURNAL_URL):
+                url = f' ref="{self.url[len(self.JOURNAL_URL) + 1:]}"'
             else:
                 url = f' url="{self.url}"'
-        html_parts = [f'<div class="with-aside">', self.left_parts[0].to_html(), f"[aside{url}]"]
+        yield f'<div class="with-aside">'
+        yield self.left_parts[0].to_html()
+        yield f"[aside{url}]"
         if len(self.right_parts) > 0:
-            html_parts.extend([x.to_html() for x in self.right_parts])
-            html_parts.append("[/aside]")
-        html_parts.append("</div>")
+            for part in self.right_parts:
+                yield part.to_html()
+            yield "[/aside]"
+        yield "</div>"
         # all of the paragraphs after the first one on the left part should go after pole
         for part in self.left_parts[1:]:
-            html_parts.append(part.to_html())
-        return "\n".join(html_parts)
+            yield part.to_html()
+
+    @staticmethod
+    def __refers_journal(part) -> bool:
+        """
+        Check if part of the right column refers to journal.tinkoff.ru
+        :param part: VParagraph or VText of the right column
+        :return: True if url of a hyperlink or text of the part has the address of journal
+        """
+        if type(part) == VParagraph:
+            for index in part.get_links_indexes():
+                if part[index].url.find(VPole.JOURNAL_URL) != -1:
+                    return True
+        return part.text.find(VPole.JOURNAL_URL) != -1
 
     def __clean_right_parts(self):
         """
@@ -67,22 +122,17 @@ class VPole:
         """
         parts = []
         if len(self.right_parts) > 0:
-            if self.url.startswith("https://journal.tinkoff.ru"):
+            if self.url.startswith(self.JOURNAL_URL):
                 self.removed_parts = self.right_parts
                 self.right_parts = []
                 return
-            remove_links = 0
-            for paragraph in self.right_parts:
-                if str(paragraph).find("https://journal.tinkoff.ru") == -1:
-                    remove_links |= 1
-                else:
-                    remove_links |= 2
-            if remove_links == 3:
-                for part in self.right_parts:
-                    if str(part).find("https://journal.tinkoff.ru") == -1:
-                        parts.append(part)
-                    else:
+            journal = [self.__refers_journal(part) for part in self.right_parts]
+            if any(journal) and not all(journal):
+                for part, refers_journal in zip(self.right_parts, journal):
+                    if refers_journal:
                         self.removed_parts.append(part)
+                    else:
+                        parts.append(part)
             else:
                 parts = self.right_parts
             if len(parts) == 1 and type(parts[0]) == VParagraph:
@@ -92,21 +142,23 @@ class VPole:
                     parts[0] = VText(parts[0].text)
         self.right_parts = parts
 
-    def parse(self, row: _Row):
+    def parse(self, row: _Row, right: list = None):
         """
         Parse row to VPole
         :param row: row from docx.table.Table
+        :param right: parsed paragraphs of the right cell, they are parsed from the row if they are not given
         """
-        left: _Cell = row.cells[0]
-        right: _Cell = row.cells[1]
+        cells = row.cells
+        left: _Cell = cells[0]
+        if right is None:
+            right = [VParagraph(para, False) for para in cells[1].paragraphs]
         self.left_parts = []
         self.right_parts = []
         for para in left.paragraphs:
             paragraph = VParagraph(para, False)
             if str(paragraph).strip() != "":
                 self.left_parts.append(paragraph)
-        for para in right.paragraphs:
-            paragraph = VParagraph(para, False)
+        for paragraph in right:
             if str(paragraph).strip() != "":
                 self.right_parts.append(paragraph)
         if len(self.right_parts) == 1:
@@ -127,6 +179,18 @@ class VPole:
         for paragraph in self.right_parts:
             paragraph.do_typograf(nobr_enabled=False)
 
+    def typograf_nodes(self) -> list:
+        """
+        Get text parts which are reworked by do_typograf
+        :return: list of (part, nobr_enabled, is picture caption)
+        """
+        nodes = self.left_parts[0].typograf_nodes(nobr_enabled=False)
+        for paragraph in self.left_parts[1:]:
+            nodes.extend(paragraph.typograf_nodes())
+        for paragraph in self.right_parts:
+            nodes.extend(paragraph.typograf_nodes(nobr_enabled=False))
+        return nodes
+
     @staticmethod
     def parse_poles(table: Table) -> list:
         """
@@ -136,10 +200,12 @@ class VPole:
         """
         poles = []
         for row in table.rows:
-            right_text = "".join([VParagraph(x).text for x in row.cells[1].paragraphs])
-            if right_text == "":
-                for para in row.cells[0].paragraphs:
+            cells = row.cells
+            # paragraphs of the right cell are parsed once and reused by the pole
+            right = [VParagraph(para, False) for para in cells[1].paragraphs]
+            if "".join([paragraph.text for paragraph in right]) == "":
+                for para in cells[0].paragraphs:
                     poles.append(VParagraph(para))
             else:
-                poles.append(VPole(row))
+                poles.append(VPole(row, right))
         return poles
@@ -1,6 +1,11 @@
+from __future__ import annotations
 from enum import Enum
-from docx.table import Table, _Column
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:  # docx is imported when the first document is parsed
+    from docx.table import Table
+
+from .VParagraph import VParagraph
 from .VPole import VPole
 from .VPlashka import VPlashka
 from .VBigTable import VBigTable
@@ -8,6 +13,8 @@ from .VText import VText
 
 
 class VTable:
+    __slots__ = ("raw", "type", "items")
+
     class TYPE(Enum):
         """
         Type of VTable
@@ -28,23 +35,54 @@ class VTable:
         if table is not None:
             self.parse(table)
 
+    def release_raw(self):
+        """
+        Release references to docx objects of the table and its items
+        """
+        self.raw = None
+        for item in self.items:
+            item.release_raw()
+
+    def invalidate(self):
+        """
+        Drop values derived from texts of paragraphs of the table after the texts are changed
+        """
+        for item in self.items:
+            if type(item) in (VPlashka, VPole):
+                item.invalidate()
+
     def __iter__(self):
         return self.items.__iter__()
 
     def __str__(self):
         return "".join([str(x) for x in self])
 
+    def iter_html(self, skip_tables: bool = False):
+        """
+        Get html representation by fragments which are produced one by one
+        :param skip_tables: adds stub instead of big tables
+        :return: iterator over fragments of html representation
+        """
+        separator = ""
+        if self.type == VTable.TYPE.POLES or self.type == VTable.TYPE.PLASHKA:
+            separator = "\n\n"
+        for index, item in enumerate(self):
+            if index > 0:
+                yield separator
+            if type(item) in [VParagraph, VText]:
+                yield item.to_html()
+            elif self.type == VTable.TYPE.BIG_TABLE:
+                yield from item.iter_html(skip_tables)
+            else:
+                yield from item.iter_html()
+
     def to_html(self, skip_tables: bool = False):
         """
         Get html representation
+        :param skip_tables: adds stub instead of big tables
         :return: html representation
         """
-        if self.type == VTable.TYPE.POLES or self.type == VTable.TYPE.PLASHKA:
-            return "\n\n".join([x.to_html() for x in self])
-        elif self.type == VTable.TYPE.BIG_TABLE:
-            return "".join([x.to_html(skip_tables) for x in self])
-        else:
-            return "".join([x.to_html() for x in self])
+        return "".join(self.iter_html(skip_tables))
 
     def do_typograf(self):
         """
@@ -54,39 +92,78 @@ class VTable:
         for item in self.items:
             item.do_typograf()
 
+    def typograf_nodes(self) -> list:
+        """
+        Get text parts which are reworked by do_typograf
+        :return: list of (part, nobr_enabled, is picture caption)
+        """
+        nodes = []
+        for item in self.items:
+            nodes.extend(item.typograf_nodes())
+        return nodes
+
+    @staticmethod
+    def __cell_text(tc) -> str:
+        """
+        Get text of cell from its xml
+        :param tc: w:tc element of the cell
+        :return: the same text as docx.table._Cell.text gives
+        """
+        return "\n".join([p.text for p in tc.p_lst])
+
+    @staticmethod
+    def __leading_texts(table: Table, number: int) -> list:
+        """
+        Get texts of the first cells of the layout grid of table walking only the first w:tc elements
+        Texts are the same as docx.table.Table.columns[i].cells[0].text gives for i < number
+        :param table: docx table
+        :param number: number of cells
+        :return: list of texts, it is shorter than number if table has fewer cells
+        """
+        texts = []
+        for tr in table._tbl.tr_lst:
+            for tc in tr.tc_lst:
+                texts.extend([VTable.__cell_text(tc)] * tc.grid_span)
+                if len(texts) >= number:
+                    return texts[:number]
+        return texts
+
     def parse(self, table: Table) -> []:
         """
         Parse docx table
+        Type of the table is found from w:tblGrid and the first cells, cells are parsed only by the chosen type
         :param table: docx table
         :return: list of included items in table (VPole/VPlashka/VBigTable)
         """
-        rows_len = len(table.rows)
-        columns_len = len(table.columns)
+        from docx.table import _Cell
+        rows_len = len(table._tbl.tr_lst)
+        grid_columns = table._tbl.tblGrid.gridCol_lst
+        columns_len = len(grid_columns)
         if rows_len < 1:
             return []
         # 1. Pole should have 2 columns, right column thinner than 60% of the left column
         #    and text in the left part should be more than twice bigger than right part
         # 2. If table has only one cell in it then it is Plashka
         # 3. BigTable otherwise
-        if columns_len == 2 and len(table.columns[0].cells) > 0 and len(table.columns[1].cells) > 0:
-            left_column: _Column = table.columns[0]
-            right_column: _Column = table.columns[1]
-            if float(left_column._gridCol.values()[0]) * 0.6 > float(right_column._gridCol.values()[0]) and \
-               len(left_column.cells[0].text) * 0.5 > len(right_column.cells[0].text):
+        texts = self.__leading_texts(table, 2) if columns_len == 2 else []
+        if columns_len == 2 and len(texts) == 2:
+            if float(grid_columns[0].values()[0]) * 0.6 > float(grid_columns[1].values()[0]) and \
+               len(texts[0]) * 0.5 > len(texts[1]):
                 self.items.extend(VPole.parse_poles(table))
                 self.type = VTable.TYPE.POLES
             else:
                 self.type = VTable.TYPE.BIG_TABLE
                 self.items.append(VBigTable(table))
         elif columns_len == 1:
-            self.items.append(VPlashka(table.rows[0].cells[0]))
+            rows = VBigTable.grid_rows(table)
+            if rows is None:  # python-docx raises its error for vertical merge without start
+                rows = [[cell._tc for cell in row.cells] for row in table.rows]
+            self.items.append(VPlashka(_Cell(rows[0][0], table)))
             self.type = VTable.TYPE.PLASHKA
+            for cells in rows[1:]:
+                for tc in cells:
+                    self.items.append(VText(self.__cell_text(tc)))
         else:
             self.type = VTable.TYPE.BIG_TABLE
             self.items.append(VBigTable(table))
-        if rows_len > 1 and columns_len == 1:
-            rows = table.rows[1:]
-            for row in rows:
-                for cell in row.cells:
-                    self.items.append(VText(cell.text))
         return self.items
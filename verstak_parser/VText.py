@@ -1,7 +1,13 @@
-from .typograf import Glue
+import bisect
+from typing import Optional
+
+from .typograf import Glue, get_glue, get_typograf_cache, BATCH_SEPARATOR
+from .textedit import EditBuffer
 
 
 class VText:
+    __slots__ = ("text", "glue_warning", "raw")
+
     def __init__(self, text: str = ""):
         """
         Common class for text object from docx
@@ -9,11 +15,25 @@ class VText:
         """
         self.text = text
         self.glue_warning = False
-        self.glue = Glue()
+        self.raw = None
+
+    @property
+    def glue(self) -> Glue:
+        """
+        Shared compiled rules of typograph
+        :return: compiled rules of typograph
+        """
+        return get_glue()
 
     def __str__(self):
         return self.text
 
+    def release_raw(self):
+        """
+        Release reference to docx element of the part
+        """
+        self.raw = None
+
     def to_html(self) -> str:
         """
         Get html representation
@@ -21,6 +41,39 @@ class VText:
         """
         return self.text
 
+    @staticmethod
+    def glue_tags(glue_type: str = "nobr") -> tuple:
+        """
+        Get tags for glue type
+        :param glue_type: type of glue tag (nobr/span)
+        :return: open and close tags
+        """
+        if glue_type == "nobr":
+            return f"[{glue_type}]", f"[/{glue_type}]"
+        elif glue_type == "span":
+            return f"<{glue_type}>", f"</{glue_type}>"
+        else:
+            raise Exception(f"Glue type ({glue_type}) is not known")
+
+    @staticmethod
+    def glue_edits(indexes: list, glue_type: str = "nobr") -> Optional[list]:
+        """
+        Get edits which connect parts of text with special tag (e.g. [nobr][/nobr])
+        :param indexes: sorted list of indexes [[start, end], [start, end]]
+        :param glue_type: type of glue tag (nobr/span)
+        :return: list of edits for EditBuffer or None if parts of text are overlapped
+        """
+        open_tag, close_tag = VText.glue_tags(glue_type)
+        edits = []
+        previous_end = 0
+        for start, end in indexes:
+            if start < previous_end:
+                return None
+            edits.append((start, start, open_tag))
+            edits.append((end, end, close_tag))
+            previous_end = end
+        return edits
+
     def add_glue(self, nobr_start: int, nobr_end: int, glue_type: str = "nobr") -> int:
         """
         Connect parts of text with special tag (e.g. [nobr][/nobr])
@@ -30,14 +83,7 @@ class VText:
         :return: amount of characters on which text was extended
         """
         text = self.text
-        if glue_type == "nobr":
-            open_tag = f"[{glue_type}]"
-            close_tag = f"[/{glue_type}]"
-        elif glue_type == "span":
-            open_tag = f"<{glue_type}>"
-            close_tag = f"</{glue_type}>"
-        else:
-            raise Exception(f"Glue type ({glue_type}) is not known")
+        open_tag, close_tag = self.glue_tags(glue_type)
         self.text = "{}{}{}{}{}".format(text[:nobr_start], open_tag,
                                         text[nobr_start:nobr_end],
                                         close_tag, text[nobr_end:])
@@ -58,38 +104,71 @@ class VText:
             self.text = f"{text[:index]}{char}"
         return len(self.text) - previous_len
 
-    def __add_nobr(self):
+    @staticmethod
+    def __add_glues(buffer: EditBuffer, indexes: list, glue_type: str):
         """
-        Add nobr by rules from typograph
+        Add glue tags to the text of edit buffer
+        :param buffer: edit buffer with text
+        :param indexes: list of indexes [[start, end], [start, end]]
+        :param glue_type: type of glue tag (nobr/span)
         """
-        nobr_indexes = self.glue.nobr(self.text)
-        nobr_indexes.sort()
-        if len(nobr_indexes) > 0:
+        indexes.sort()
+        edits = VText.glue_edits(indexes, glue_type)
+        if edits is None:  # overlapped parts are glued one by one with shifts of the whole text
+            text = VText(buffer.text)
             shift = 0
-            for index in nobr_indexes:
-                shift += self.add_glue(index[0] + shift, index[1] + shift)
+            for index in indexes:
+                shift += text.add_glue(index[0] + shift, index[1] + shift, glue_type)
+            edits = [(0, len(buffer), text.text)]
+        buffer.apply(edits)
 
-    def __add_nbsp(self):
+    @staticmethod
+    def __add_phase(buffer: EditBuffer, glue: Glue, phase: str, indexes: list):
         """
-        Add nbsp by rules from typograph
+        Add changes of one phase of typograph to the text of edit buffer
+        :param buffer: edit buffer with text
+        :param glue: rules of typograph
+        :param phase: nobr, nbsp or span
+        :param indexes: indexes found by rules of the phase
         """
-        nbsp_indexes = self.glue.nbsp(self.text)
-        if len(nbsp_indexes) > 0:
-            nbsp_indexes.sort()
-            shift = 0
-            for index in nbsp_indexes:
-                shift += self.replace_char_in_place(index + shift, self.glue.NBSP)
+        if phase == "nbsp":
+            indexes.sort()
+            buffer.apply([(index, index + 1, glue.NBSP) for index in indexes])
+        else:
+            VText.__add_glues(buffer, indexes, phase)
 
-    def __add_span(self):
+    @staticmethod
+    def picture_tags(text: str) -> str:
         """
-        Add span by rules from typograph
+        Replace nobr tags of tipograf by html ones which are used in picture captions
+        :param text: reworked text
+        :return: text with <nobr></nobr> tags
         """
-        span_indexes = self.glue.span(self.text)
-        if len(span_indexes) > 0:
-            span_indexes.sort()
-            shift = 0
-            for index in span_indexes:
-                shift += self.add_glue(index[0] + shift, index[1] + shift, "span")
+        return text.replace("[nobr]", "<nobr>").replace("[/nobr]", "</nobr>")
+
+    @staticmethod
+    def typograf_text(glue: Glue, text: str, nobr_enabled: bool = True, picture: bool = False) -> str:
+        """
+        Rework text by rules from typograph
+        All phases edit the text through one edit buffer, results are kept by the shared cache
+        :param glue: rules of typograph
+        :param text: text to rework
+        :param nobr_enabled: allow nobr additions
+        :param picture: text is a picture caption
+        :return: resulted text
+        """
+        cache = get_typograf_cache()
+        key = cache.key(glue, text, nobr_enabled, picture)
+        result = cache.get(key)
+        if result is None:
+            buffer = EditBuffer(text)
+            if nobr_enabled:
+                VText.__add_phase(buffer, glue, "nobr", glue.nobr(buffer.text))
+            VText.__add_phase(buffer, glue, "nbsp", glue.nbsp(buffer.text))
+            VText.__add_phase(buffer, glue, "span", glue.span(buffer.text))
+            result = VText.picture_tags(buffer.text) if picture else buffer.text
+            cache.put(key, result)
+        return result
 
     def do_typograf(self, nobr_enabled: bool = True):
         """
@@ -97,8 +176,104 @@ class VText:
         :param nobr_enabled: allow nobr additions
         :return: resulted text
         """
-        if nobr_enabled:
-            self.__add_nobr()
-        self.__add_nbsp()
-        self.__add_span()
+        self.text = self.typograf_text(self.glue, self.text, nobr_enabled)
         return self.text
+
+    def typograf_nodes(self, nobr_enabled: bool = True) -> list:
+        """
+        Get text parts which are reworked by do_typograf
+        :param nobr_enabled: allow nobr additions
+        :return: list of (part, nobr_enabled, is picture caption)
+        """
+        return [(self, nobr_enabled, False)]
+
+    @staticmethod
+    def do_typograf_batch(nodes: list) -> list:
+        """
+        Rework texts of many parts by rules from typograph in a few large passes
+        Results of texts which are kept by the shared cache are taken from it,
+        the rest of different texts are reworked together (see VText.__rework_batch)
+        :param nodes: list of (part, nobr_enabled, is picture caption) from typograf_nodes
+        :return: resulted texts
+        """
+        glue = get_glue()
+        cache = get_typograf_cache()
+        texts = []
+        keys = []
+        pending = {}  # nodes to rework by their texts, flags and kinds
+        for part, nobr_enabled, picture in nodes:
+            node_key = (part.text, nobr_enabled, picture)
+            key = cache.key(glue, *node_key)
+            text = cache.get(key) if node_key not in pending else None
+            if text is None:
+                pending.setdefault(node_key, (part, nobr_enabled, picture))
+            texts.append(text)
+            keys.append(key)
+        reworked = dict(zip(pending.keys(), VText.__rework_batch(glue, list(pending.values()))))
+        for index, (part, nobr_enabled, picture) in enumerate(nodes):
+            if texts[index] is None:
+                texts[index] = reworked[(part.text, nobr_enabled, picture)]
+                cache.put(keys[index], texts[index])
+        for (part, _, _), text in zip(nodes, texts):
+            part.text = text
+        return texts
+
+    @staticmethod
+    def __rework_batch(glue: Glue, nodes: list) -> list:
+        """
+        Rework texts of many parts together
+        Texts are joined with a separator and searched together for every phase,
+        texts touched by matches across the separator are searched one by one
+        :param glue: rules of typograph
+        :param nodes: list of (part, nobr_enabled, is picture caption)
+        :return: resulted texts, texts of parts are not changed
+        """
+        buffers = [EditBuffer(part.text) for part, _, _ in nodes]
+        for phase in ["nobr", "nbsp", "span"]:
+            selected = [index for index in range(len(nodes)) if phase != "nobr" or nodes[index][1]]
+            if glue.batchable:
+                found = VText.__batch_indexes(glue, phase, [buffers[index].text for index in selected])
+            else:
+                found = [None] * len(selected)
+            for index, indexes in zip(selected, found):
+                if indexes is None:
+                    indexes = glue.indexes(phase, glue.matches(phase, buffers[index].text))
+                VText.__add_phase(buffers[index], glue, phase, indexes)
+        return [VText.picture_tags(buffer.text) if picture else buffer.text
+                for (_, _, picture), buffer in zip(nodes, buffers)]
+
+    @staticmethod
+    def __batch_indexes(glue: Glue, phase: str, texts: list) -> list:
+        """
+        Search rules of a phase in many texts at once
+        :param glue: rules of typograph
+        :param phase: nobr, nbsp or span
+        :param texts: texts to search in
+        :return: indexes of the phase for every text or None if the text should be searched alone
+        """
+        if len(texts) == 0:
+            return []
+        starts = []
+        position = 0
+        for text in texts:
+            starts.append(position)
+            position += len(text) + len(BATCH_SEPARATOR)
+        found = [[] for _ in texts]
+        touched = [False] * len(texts)
+        matches = glue.matches(phase, BATCH_SEPARATOR.join(texts))
+        for rule, rule_matches in enumerate(matches):
+            for text_index in range(len(texts)):
+                found[text_index].append([])
+            for start, end, group_start, group_end in rule_matches:
+                text_index = bisect.bisect_right(starts, start) - 1
+                text_start = starts[text_index]
+                if start >= text_start and end <= text_start + len(texts[text_index]):
+                    if group_start >= 0:
+                        group_start -= text_start
+                        group_end -= text_start
+                    found[text_index][rule].append((start - text_start, end - text_start, group_start, group_end))
+                else:  # all texts which the match touches are searched alone
+                    last_index = bisect.bisect_right(starts, max(end - 1, start)) - 1
+                    for index in range(text_index, last_index + 1):
+                        touched[index] = True
+        return [None if touched[index] else glue.indexes(phase, found[index]) for index in range(len(texts))]
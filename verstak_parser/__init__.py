@@ -13,4 +13,20 @@ from .VPlashka import VPlashka
 from .VPole import VPole
 from .VBigTable import VBigTable
 from .VTable import VTable
-from .typograf import Glue
+from .typograf import Glue, get_glue, TypografCache, get_typograf_cache
+from .textedit import EditBuffer
+
+# modules which import heavy dependencies on their own are imported when they are requested
+_LAZY_MODULES = {
+    "DocxReader": "docx_reader",
+    "ImageStore": "images",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_MODULES:
+        import importlib
+        value = getattr(importlib.import_module(f".{_LAZY_MODULES[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
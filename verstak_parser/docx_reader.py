@@ -0,0 +1,220 @@
+import posixpath
+import zipfile
+from typing import Iterator, Optional
+from lxml import etree
+from docx.enum.style import WD_STYLE_TYPE
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from docx.parts.styles import StylesPart
+from docx.styles.styles import Styles
+
+try:
+    from docx.oxml.parser import element_class_lookup
+except ImportError:  # python-docx < 1.0
+    from docx.oxml import element_class_lookup
+
+_RELS_NAMESPACE = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+
+class _Relationship:
+    def __init__(self, rId: str, reltype: str, target_ref: str, is_external: bool):
+        """
+        Relationship of the document part
+        :param rId: id of relationship
+        :param reltype: type of relationship
+        :param target_ref: url for external relationships and path relative to the document part otherwise
+        :param is_external: is target outside of the package
+        """
+        self.rId = rId
+        self.reltype = reltype
+        self.target_ref = target_ref
+        self.is_external = is_external
+
+
+class _Part:
+    def __init__(self, reader, partname: str):
+        """
+        Part of the package which is read when its content is requested
+        :param reader: reader of the package
+        :param partname: name of part in zip archive
+        """
+        self.partname = PackURI(f"/{partname}")
+        self.__reader = reader
+
+    @property
+    def blob(self) -> bytes:
+        """
+        Content of the part
+        :return: content of the part
+        """
+        return self.__reader.read_part(self.partname[1:])
+
+
+class DocxReader:
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, path):
+        """
+        Reader of docx file which streams the body of the document without building python-docx Document
+        Paragraphs and tables of the body are given as python-docx oxml elements
+        and the reader can be used as their parent to get relationships and styles
+        :param path: docx file path or file-like object
+        """
+        self.__zip = zipfile.ZipFile(path)
+        self.partname = self.__document_partname()
+        self.rels = self.__load_rels(self.partname)
+        self.__styles = None
+        self.__style_cache = {}
+        self.__related_parts = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.__zip.close()
+
+    @property
+    def part(self):
+        """
+        Part of the document for python-docx proxies (Paragraph, Table) created with the reader as parent
+        :return: the reader itself
+        """
+        return self
+
+    @staticmethod
+    def __rels_name(partname: str) -> str:
+        """
+        Get name of relationships item for part
+        :param partname: name of part in zip archive
+        :return: name of relationships item in zip archive
+        """
+        directory, name = posixpath.split(partname)
+        return posixpath.join(directory, "_rels", f"{name}.rels")
+
+    def __read_rels(self, partname: str) -> list:
+        """
+        Read relationships of part
+        :param partname: name of part in zip archive ("" for the package)
+        :return: list of (id, type, target, is external)
+        """
+        try:
+            xml = self.__zip.read(self.__rels_name(partname))
+        except KeyError:
+            return []
+        rels = []
+        for rel in etree.fromstring(xml).iter(f"{{{_RELS_NAMESPACE}}}Relationship"):
+            rels.append((rel.get("Id"), rel.get("Type"), rel.get("Target"), rel.get("TargetMode") == "External"))
+        return rels
+
+    def __document_partname(self) -> str:
+        """
+        Find main document part in the package
+        :return: name of main document part in zip archive
+        """
+        for _, reltype, target, is_external in self.__read_rels(""):
+            if reltype == RT.OFFICE_DOCUMENT and not is_external:
+                return PackURI.from_rel_ref("/", target)[1:]
+        return "word/document.xml"
+
+    def __load_rels(self, partname: str) -> dict:
+        """
+        Load relationships of part
+        :param partname: name of part in zip archive
+        :return: relationships by their ids
+        """
+        base_uri = posixpath.dirname(f"/{partname}")
+        rels = {}
+        for rId, reltype, target, is_external in self.__read_rels(partname):
+            if not is_external:  # the same reference as python-docx gives for internal parts
+                target = PackURI.from_rel_ref(base_uri, target).relative_ref(base_uri)
+            rels[rId] = _Relationship(rId, reltype, target, is_external)
+        return rels
+
+    def target_partname(self, rel: _Relationship) -> str:
+        """
+        Get name of the part in zip archive which is the target of internal relationship
+        :param rel: internal relationship of the document part
+        :return: name of part in zip archive
+        """
+        return PackURI.from_rel_ref(posixpath.dirname(f"/{self.partname}"), rel.target_ref)[1:]
+
+    @property
+    def related_parts(self) -> dict:
+        """
+        Parts which are targets of internal relationships like python-docx Part.related_parts
+        :return: parts by ids of relationships
+        """
+        if self.__related_parts is None:
+            self.__related_parts = {rId: _Part(self, self.target_partname(rel))
+                                    for rId, rel in self.rels.items() if not rel.is_external}
+        return self.__related_parts
+
+    def read_part(self, partname: str) -> bytes:
+        """
+        Read part of the package
+        :param partname: name of part in zip archive
+        :return: content of the part
+        """
+        return self.__zip.read(partname)
+
+    @property
+    def styles(self) -> Styles:
+        """
+        Styles of the document, default python-docx styles are used if document doesn't have them
+        :return: python-docx styles
+        """
+        if self.__styles is None:
+            for rel in self.rels.values():
+                if rel.reltype == RT.STYLES and not rel.is_external:
+                    self.__styles = Styles(parse_xml(self.read_part(self.target_partname(rel))))
+                    break
+            else:
+                self.__styles = Styles(parse_xml(StylesPart._default_styles_xml()))
+        return self.__styles
+
+    def get_style(self, style_id: Optional[str], style_type: WD_STYLE_TYPE):
+        """
+        Get style by id like python-docx DocumentPart does
+        :param style_id: id of the style or None for the default style
+        :param style_type: type of the style
+        :return: python-docx style
+        """
+        key = (style_id, style_type)
+        if key not in self.__style_cache:
+            self.__style_cache[key] = self.styles.get_by_id(style_id, style_type)
+        return self.__style_cache[key]
+
+    def iter_body(self, clear: bool = True) -> Iterator:
+        """
+        Stream elements of the document body
+        Every element is removed from the tree when the next one is requested
+        :param clear: clear removed elements, elements which are referenced after parsing should not be cleared
+        :return: iterator over python-docx oxml elements of the body (CT_P, CT_Tbl, ...)
+        """
+        parser = etree.XMLPullParser(events=("start", "end"), remove_blank_text=True, resolve_entities=False)
+        parser.set_element_class_lookup(element_class_lookup)
+        body_tag = qn("w:body")
+        body = None
+        with self.__zip.open(self.partname) as document:
+            while True:
+                chunk = document.read(self.CHUNK_SIZE)
+                if chunk:
+                    parser.feed(chunk)
+                else:
+                    parser.close()
+                for event, element in parser.read_events():
+                    if event == "start":
+                        if body is None and element.tag == body_tag:
+                            body = element
+                    elif body is not None and element.getparent() is body:
+                        yield element
+                        body.remove(element)
+                        if clear:
+                            element.clear()
+                if not chunk:
+                    break
@@ -0,0 +1,275 @@
+import zlib
+import struct
+from typing import BinaryIO, Union
+
+from .VText import VText
+from .VBoldText import VBoldText
+from .VHyperlink import VHyperlink
+from .VListParagraph import VListParagraph
+from .VParagraph import VParagraph
+from .VPicture import VPicture, VTextPicture
+from .VPlashka import VPlashka
+from .VPole import VPole
+from .VBigTable import VBigTable
+from .VTable import VTable
+from .VDocument import VDocument
+
+DUMP_MAGIC = b"VERSTAK\0"
+# version of the format, dumps of other versions are not loaded
+DUMP_VERSION = 1
+DUMP_EXTENSION = ".vdump"
+
+# classes of parts with their stored fields, the rest of their fields are None after loading,
+# changes of this list need a new version of the format
+_CLASSES = (
+    (VDocument, ("first_table", "first_title", "parts", "paragraphs_split", "typografed")),
+    (VText, ("text", "glue_warning")),
+    (VTextPicture, ("text", "glue_warning")),
+    (VBoldText, ("text", "glue_warning", "bold")),
+    (VHyperlink, ("text", "glue_warning", "url")),
+    (VListParagraph, ("text", "glue_warning", "level", "type")),
+    (VParagraph, ("parts", "title_enabled", "title", "title_level")),
+    (VPicture, ("caption", "src")),
+    (VPlashka, ("parts",)),
+    (VPole, ("title", "left_parts", "right_parts", "url", "removed_parts")),
+    (VBigTable, ("title", "headers", "rows")),
+    (VTable, ("type", "items")),
+)
+_ENUMS = (VTable.TYPE, VListParagraph.Type)
+
+# tags of values
+_NONE, _TRUE, _FALSE, _INT, _STR, _STR_REF, _LIST, _OBJECT, _OBJECT_REF, _ENUM = b"NTFISRLOPE"
+
+
+def _slots(cls: type) -> list:
+    """
+    Get names of attributes of all slots of class and its bases
+    :param cls: class with __slots__
+    :return: names of attributes, private names are mangled
+    """
+    names = []
+    for klass in cls.__mro__:
+        for slot in klass.__dict__.get("__slots__", ()):
+            if slot.startswith("__") and not slot.endswith("__"):
+                slot = f"_{klass.__name__.lstrip('_')}{slot}"
+            names.append(slot)
+    return names
+
+
+def _attribute(cls: type, field: str) -> str:
+    """
+    Get name of attribute of stored field
+    :param cls: class of part
+    :param field: stored field
+    :return: name of the attribute, fields which are properties are stored by their private attributes
+    """
+    if isinstance(getattr(cls, field, None), property):
+        return f"_{cls.__name__}__{field}"
+    return field
+
+
+_FIELDS = {cls: tuple([_attribute(cls, field) for field in fields]) for cls, fields in _CLASSES}
+_DEFAULTS = {cls: tuple([name for name in _slots(cls) if name not in _FIELDS[cls]]) for cls, _ in _CLASSES}
+_CLASS_TAGS = {cls: index for index, (cls, _) in enumerate(_CLASSES)}
+_ENUM_TAGS = {enum: index for index, enum in enumerate(_ENUMS)}
+
+
+class _Writer:
+    def __init__(self):
+        """
+        Encoder of parts of document to bytes
+        Strings and objects which are met again are written as references to their first occurrences
+        """
+        self.data = bytearray()
+        self.strings = {}
+        self.objects = {}
+
+    def uint(self, value: int):
+        """
+        Write unsigned integer by 7 bits in a byte
+        :param value: integer
+        """
+        while value >= 0x80:
+            self.data.append(value & 0x7f | 0x80)
+            value >>= 7
+        self.data.append(value)
+
+    def value(self, value):
+        """
+        Write value with its tag
+        :param value: None, bool, int, str, list, enum or part of document
+        """
+        data = self.data
+        if value is None:
+            data.append(_NONE)
+        elif value is True:
+            data.append(_TRUE)
+        elif value is False:
+            data.append(_FALSE)
+        elif type(value) == int:
+            data.append(_INT)
+            self.uint(value << 1 if value >= 0 else (-value << 1) - 1)
+        elif type(value) == str:
+            index = self.strings.get(value)
+            if index is not None:
+                data.append(_STR_REF)
+                self.uint(index)
+                return
+            self.strings[value] = len(self.strings)
+            encoded = value.encode("utf-8")
+            data.append(_STR)
+            self.uint(len(encoded))
+            data.extend(encoded)
+        elif type(value) == list:
+            data.append(_LIST)
+            self.uint(len(value))
+            for item in value:
+                self.value(item)
+        elif type(value) in _ENUM_TAGS:
+            data.append(_ENUM)
+            self.uint(_ENUM_TAGS[type(value)])
+            self.uint(value.value)
+        elif type(value) in _CLASS_TAGS:
+            index = self.objects.get(id(value))
+            if index is not None:
+                data.append(_OBJECT_REF)
+                self.uint(index)
+                return
+            self.objects[id(value)] = len(self.objects)
+            data.append(_OBJECT)
+            self.uint(_CLASS_TAGS[type(value)])
+            for name in _FIELDS[type(value)]:
+                self.value(getattr(value, name))
+        else:
+            raise Exception(f"Value of type {type(value).__name__} can't be dumped")
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        """
+        Decoder of parts of document from bytes of _Writer
+        :param data: encoded parts
+        """
+        self.data = data
+        self.position = 0
+        self.strings = []
+        self.objects = []
+
+    def uint(self) -> int:
+        """
+        Read unsigned integer
+        :return: integer
+        """
+        data = self.data
+        result = 0
+        shift = 0
+        while True:
+            byte = data[self.position]
+            self.position += 1
+            result |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def value(self):
+        """
+        Read value
+        :return: None, bool, int, str, list, enum or part of document
+        """
+        tag = self.data[self.position]
+        self.position += 1
+        if tag == _STR:
+            length = self.uint()
+            value = self.data[self.position:self.position + length].decode("utf-8")
+            self.position += length
+            self.strings.append(value)
+            return value
+        elif tag == _STR_REF:
+            return self.strings[self.uint()]
+        elif tag == _LIST:
+            return [self.value() for _ in range(self.uint())]
+        elif tag == _OBJECT:
+            cls = _CLASSES[self.uint()][0]
+            value = cls.__new__(cls)
+            self.objects.append(value)  # references to the object can be met in its fields
+            for name in _FIELDS[cls]:
+                setattr(value, name, self.value())
+            for name in _DEFAULTS[cls]:
+                setattr(value, name, None)
+            return value
+        elif tag == _OBJECT_REF:
+            return self.objects[self.uint()]
+        elif tag == _NONE:
+            return None
+        elif tag == _TRUE:
+            return True
+        elif tag == _FALSE:
+            return False
+        elif tag == _INT:
+            value = self.uint()
+            return value >> 1 if value & 1 == 0 else -((value + 1) >> 1)
+        elif tag == _ENUM:
+            enum = _ENUMS[self.uint()]
+            return enum(self.uint())
+        raise Exception(f"Dump is damaged: unknown tag {tag} at {self.position - 1}")
+
+
+def dump_document(document: VDocument) -> bytes:
+    """
+    Encode parsed document
+    References to docx objects are not stored, so the document is loaded without python-docx
+    :param document: parsed document, it can be reworked by tipograf
+    :return: content of dump file
+    """
+    writer = _Writer()
+    writer.value(document)
+    return DUMP_MAGIC + struct.pack(">H", DUMP_VERSION) + zlib.compress(bytes(writer.data))
+
+
+def load_document(data: bytes) -> VDocument:
+    """
+    Decode document from content of dump file
+    :param data: content of dump file
+    :return: document which is rendered like the dumped one
+    """
+    header_size = len(DUMP_MAGIC) + 2
+    if data[:len(DUMP_MAGIC)] != DUMP_MAGIC:
+        raise Exception("Dump of verstak document is expected")
+    version, = struct.unpack(">H", data[len(DUMP_MAGIC):header_size])
+    if version != DUMP_VERSION:
+        raise Exception(f"Dump version {version} is not supported (supported version is {DUMP_VERSION}), "
+                        f"the document should be converted again")
+    try:
+        document = _Reader(zlib.decompress(data[header_size:])).value()
+    except (zlib.error, IndexError, UnicodeDecodeError, ValueError) as error:
+        raise Exception(f"Dump is damaged: {error}")
+    if type(document) != VDocument:
+        raise Exception("Dump of verstak document is expected")
+    document.split_paragraphs()  # paragraphs of dumps which are made before the split are split after loading
+    return document
+
+
+def dump(document: VDocument, target: Union[str, BinaryIO]):
+    """
+    Write parsed document to dump file
+    :param document: parsed document
+    :param target: file path or binary file object
+    """
+    data = dump_document(document)
+    if hasattr(target, "write"):
+        target.write(data)
+        return
+    with open(target, "wb") as dump_file:
+        dump_file.write(data)
+
+
+def load(source: Union[str, BinaryIO]) -> VDocument:
+    """
+    Read document from dump file
+    :param source: file path or binary file object
+    :return: document which is rendered like the dumped one
+    """
+    if hasattr(source, "read"):
+        return load_document(source.read())
+    with open(source, "rb") as dump_file:
+        return load_document(dump_file.read())
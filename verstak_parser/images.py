@@ -0,0 +1,96 @@
+import os
+import hashlib
+import threading
+from typing import Optional
+
+
+class ImageStore:
+    def __init__(self, directory: str, url_prefix: Optional[str] = None, workers: int = 4):
+        """
+        Store of images which are written to the directory with names made of hashes of their contents
+        Images are written on a thread pool and the same image is written once
+        :param directory: directory for images
+        :param url_prefix: path to the directory used in sources of pictures, the directory itself by default
+        :param workers: number of threads which write images
+        """
+        self.directory = directory
+        self.url_prefix = directory if url_prefix is None else url_prefix
+        self.workers = workers
+        self.__lock = threading.Lock()
+        self.__names = set()
+        self.__pending = []
+        # the pool is started with the first write, so the store can be shared with forked processes
+        self.__executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def name(blob: bytes, extension: str) -> str:
+        """
+        Get file name of image
+        :param blob: content of image
+        :param extension: extension of image file without dot
+        :return: file name made of hash of the content
+        """
+        return f"{hashlib.sha256(blob).hexdigest()}.{extension.lower()}"
+
+    def add(self, blob: bytes, extension: str) -> str:
+        """
+        Schedule writing of image unless the same image is already stored
+        :param blob: content of image
+        :param extension: extension of image file without dot
+        :return: source of image for [img] shortcode
+        """
+        name = self.name(blob, extension)
+        with self.__lock:
+            if name not in self.__names:
+                self.__names.add(name)
+                if self.__executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    os.makedirs(self.directory, exist_ok=True)
+                    self.__executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                         thread_name_prefix="verstak-images")
+                self.__pending.append(self.__executor.submit(self.__write, name, blob))
+        if self.url_prefix == "":
+            return name
+        return f"{self.url_prefix.rstrip('/')}/{name}"
+
+    def __write(self, name: str, blob: bytes):
+        """
+        Write image to the directory, images which are already in the directory are not written again
+        :param name: file name of image
+        :param blob: content of image
+        """
+        path = os.path.join(self.directory, name)
+        if os.path.isfile(path):
+            return
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as image_file:
+            image_file.write(blob)
+        os.replace(temp_path, path)
+
+    def wait(self):
+        """
+        Wait for all scheduled images to be written
+        Errors of writing are raised here
+        """
+        with self.__lock:
+            pending = self.__pending
+            self.__pending = []
+        for future in pending:
+            future.result()
+
+    def close(self):
+        """
+        Wait for all scheduled images to be written and stop the pool
+        """
+        try:
+            self.wait()
+        finally:
+            if self.__executor is not None:
+                self.__executor.shutdown()
+                self.__executor = None
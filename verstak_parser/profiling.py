@@ -0,0 +1,441 @@
+import os
+import gc
+import math
+import heapq
+import time
+import tracemalloc
+from typing import Optional
+from contextlib import contextmanager
+
+from .typograf import Glue, get_glue, get_typograf_cache
+from .VDocument import VDocument
+from .VText import VText
+from .VParagraph import VParagraph
+from .VPicture import VPicture
+from .VHyperlink import VHyperlink
+from .VTable import VTable
+from .VPole import VPole
+from .VPlashka import VPlashka
+from .VBigTable import VBigTable
+
+PROFILE_VERSION = 3
+# rules which take more than length ** SUPERLINEAR_EXPONENT time are flagged by profile_rules
+SUPERLINEAR_EXPONENT = 1.3
+# number of the slowest inputs of every rule which are measured again to find the worst one
+WORST_CANDIDATES = 5
+# growth of time of rule with length is measured on input of this number of symbols made of its longest text,
+# times of texts of documents are too short to tell it from noise
+PROBE_LENGTH = 1 << 15
+# prefixes of the probe input which are measured
+PROBE_DIVIDERS = (64, 32, 16, 8, 4, 2, 1)
+# every prefix is measured several times and the best time is taken
+PROBE_REPEAT = 5
+# longer prefixes are not measured after a measurement takes more seconds than this
+PROBE_TIME_LIMIT = 0.5
+
+
+class StageProfiler:
+    def __init__(self, trace_memory: bool = False):
+        """
+        Profiler of stages of conversion
+        :param trace_memory: measure peak memory of python objects by tracemalloc instead of wall time,
+                             tracing makes conversion several times slower, so both are not measured at once
+        """
+        self.trace_memory = trace_memory
+        self.stages = []
+        # memory which was traced before tracing is restarted (python 3.8 has no tracemalloc.reset_peak)
+        self.untraced = 0
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Measure stage of conversion
+        :param name: name of the stage
+        """
+        if self.trace_memory:
+            reset_peak = getattr(tracemalloc, "reset_peak", None)  # it is available since python 3.9
+            if reset_peak is not None:
+                reset_peak()
+            else:  # objects which are freed during the stage are still counted by its peak then
+                self.untraced += tracemalloc.get_traced_memory()[0]
+                tracemalloc.stop()
+                tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.trace_memory:
+                self.stages.append({"name": name, "peak_memory": self.untraced + tracemalloc.get_traced_memory()[1]})
+            else:
+                self.stages.append({"name": name, "wall_time": time.perf_counter() - start})
+
+
+def count_elements(document: VDocument) -> dict:
+    """
+    Count parts of document by their types
+    :param document: parsed document
+    :return: numbers of parts by types
+    """
+    counts = {"paragraphs": 0, "headings": 0, "list_items": 0, "pictures": 0, "links": 0, "tables": 0,
+              "poles": 0, "plashkas": 0, "big_tables": 0}
+
+    def count(part):
+        if type(part) == VParagraph:
+            counts["paragraphs"] += 1
+            counts["headings"] += 1 if part.title else 0
+            counts["list_items"] += 1 if part.list_type is not None else 0
+            for paragraph_part in part:
+                if type(paragraph_part) == VPicture:
+                    counts["pictures"] += 1
+                elif type(paragraph_part) == VHyperlink:
+                    counts["links"] += 1
+        elif type(part) == VTable:
+            counts["tables"] += 1
+            for item in part.items:
+                count(item)
+        elif type(part) == VPole:
+            counts["poles"] += 1
+            counts["links"] += 1 if part.url != "" else 0
+            for pole_part in part.left_parts + part.right_parts:
+                count(pole_part)
+        elif type(part) == VPlashka:
+            counts["plashkas"] += 1
+            for plashka_part in part.parts:
+                count(plashka_part)
+        elif type(part) == VBigTable:
+            counts["big_tables"] += 1
+
+    for document_part in document.parts:
+        count(document_part)
+    return counts
+
+
+def run_stages(profiler: StageProfiler, in_file: str, out_file: str, tipograf_enabled: bool,
+               allow_header_links: bool, skip_tables: bool, streaming: bool = False) -> VDocument:
+    """
+    Convert docx file to html like verstak does stage by stage
+    :param profiler: profiler of the stages
+    :param in_file: docx file path
+    :param out_file: html file path
+    :param tipograf_enabled: rework text by rules from typograph
+    :param allow_header_links: allows links to be added for headers/titles
+    :param skip_tables: adds stub instead of big tables
+    :param streaming: stream the body of the document, loading and parsing are one stage then
+    :return: converted document
+    """
+    if streaming:
+        with profiler.stage("parse"):
+            document = VDocument.from_file(in_file, streaming=True, keep_raw=False)
+    else:
+        import docx
+        with profiler.stage("load"):
+            raw = docx.Document(in_file)
+        with profiler.stage("parse"):
+            document = VDocument(raw)
+            document.release_raw()
+            del raw
+    if tipograf_enabled:
+        with profiler.stage("do_typograf"):
+            document.do_typograf()
+    with profiler.stage("render"):
+        document.store_html(out_file, allow_header_links=allow_header_links, skip_tables=skip_tables)
+    return document
+
+
+def profile_conversion(in_file: str, out_file: str, tipograf_enabled: bool, allow_header_links: bool,
+                       skip_tables: bool, streaming: bool = False, cprofile_path: Optional[str] = None) -> dict:
+    """
+    Convert docx file to html and measure stages of the conversion
+    Wall time, peak memory and cProfile dump are measured by separate conversions, so they don't distort each other
+    :param in_file: docx file path
+    :param out_file: html file path
+    :param tipograf_enabled: rework text by rules from typograph
+    :param allow_header_links: allows links to be added for headers/titles
+    :param skip_tables: adds stub instead of big tables
+    :param streaming: stream the body of the document, loading and parsing are one stage then
+    :param cprofile_path: path for cProfile dump of the conversion
+    :return: report with wall time and peak memory of stages, numbers of parts, sizes of files
+             and hits and misses of cache of tipograf
+    """
+    arguments = (in_file, out_file, tipograf_enabled, allow_header_links, skip_tables, streaming)
+    # every pass starts with the same cached results of tipograf as the measured conversion
+    cache = get_typograf_cache()
+    cache_state = cache.snapshot()
+    before = cache.stats()
+    timer = StageProfiler()
+    document = run_stages(timer, *arguments)
+    elements = count_elements(document)
+    del document
+    after = cache.stats()
+    typograf_cache = {name: after[name] - before[name] for name in ["hits", "misses"]}
+    final_state = cache.snapshot()
+    cache.restore(cache_state)
+    tracer = StageProfiler(trace_memory=True)
+    tracemalloc.start()
+    try:
+        run_stages(tracer, *arguments)
+    finally:
+        tracemalloc.stop()
+    if cprofile_path is not None:
+        import cProfile
+        cache.restore(cache_state)
+        cprofile = cProfile.Profile()
+        cprofile.runcall(run_stages, StageProfiler(), *arguments)
+        cprofile.dump_stats(cprofile_path)
+    cache.restore(final_state)
+    stages = [{**time_stage, **memory_stage} for time_stage, memory_stage in zip(timer.stages, tracer.stages)]
+    return {
+        "version": PROFILE_VERSION,
+        "input": in_file,
+        "input_size": os.path.getsize(in_file),
+        "output": out_file,
+        "output_size": os.path.getsize(out_file),
+        "options": {"t": not tipograf_enabled, "ah": allow_header_links, "st": skip_tables, "stream": streaming},
+        "stages": stages,
+        "total": {"wall_time": sum([stage["wall_time"] for stage in stages]),
+                  "peak_memory": max([stage["peak_memory"] for stage in stages])},
+        "elements": elements,
+        "typograf_cache": typograf_cache,
+    }
+
+
+def summarize(reports: list) -> dict:
+    """
+    Aggregate reports of profile_conversion
+    :param reports: reports of converted documents
+    :return: summary with sums of wall time and maximums of peak memory of stages, sums of numbers of parts,
+             sizes of files and hits of cache of tipograf and the slowest documents
+    """
+    stages = {}
+    elements = {}
+    typograf_cache = {"hits": 0, "misses": 0}
+    for report in reports:
+        for stage in report["stages"]:
+            summary = stages.setdefault(stage["name"], {"wall_time": 0.0, "peak_memory": 0})
+            summary["wall_time"] += stage["wall_time"]
+            summary["peak_memory"] = max(summary["peak_memory"], stage["peak_memory"])
+        for name, number in report["elements"].items():
+            elements[name] = elements.get(name, 0) + number
+        for name, number in report["typograf_cache"].items():
+            typograf_cache[name] += number
+    slowest = sorted(reports, key=lambda x: x["total"]["wall_time"], reverse=True)[:10]
+    return {
+        "version": PROFILE_VERSION,
+        "documents": len(reports),
+        "input_size": sum([report["input_size"] for report in reports]),
+        "output_size": sum([report["output_size"] for report in reports]),
+        "stages": [{"name": name, **summary} for name, summary in stages.items()],
+        "total": {"wall_time": sum([report["total"]["wall_time"] for report in reports]),
+                  "peak_memory": max([report["total"]["peak_memory"] for report in reports], default=0)},
+        "elements": elements,
+        "typograf_cache": typograf_cache,
+        "slowest": [{"input": report["input"], "wall_time": report["total"]["wall_time"]} for report in slowest],
+    }
+
+
+class RuleProfiler:
+    def __init__(self, glue: Optional[Glue] = None):
+        """
+        Ruleset of typograph which measures every rule while texts are reworked
+        Rules are searched one by one, it gives the same indexes as the ruleset itself
+        :param glue: ruleset to measure, the shared ruleset by default
+        """
+        self.glue = glue if glue is not None else get_glue()
+        self.NBSP = self.glue.NBSP
+        self.stats = {}
+        for phase in ["nobr", "nbsp", "span"]:
+            for rule in self.glue.rules(phase):
+                self.stats[(phase, rule["name"])] = {
+                    "rule": rule, "time": 0.0, "calls": 0, "matches": 0,
+                    # the slowest inputs are measured again for the report, single measurements are noisy
+                    "candidates": [],
+                    "longest": "",
+                }
+
+    def __indexes(self, phase: str, sentence: str) -> list:
+        """
+        Find indexes of a phase in text and measure every rule of the phase
+        :param phase: nobr, nbsp or span
+        :param sentence: text to search in
+        :return: indexes of the phase like Glue.indexes gives
+        """
+        matches = []
+        for rule in self.glue.rules(phase):
+            start = time.perf_counter()
+            rule_matches = Glue.rule_matches(rule, sentence, overlapped=phase == "nbsp")
+            elapsed = time.perf_counter() - start
+            stats = self.stats[(phase, rule["name"])]
+            stats["time"] += elapsed
+            stats["calls"] += 1
+            stats["matches"] += len(rule_matches)
+            candidates = stats["candidates"]
+            if len(candidates) < WORST_CANDIDATES or elapsed > candidates[0][0]:
+                if len(candidates) == WORST_CANDIDATES:
+                    heapq.heappop(candidates)
+                heapq.heappush(candidates, (elapsed, stats["calls"], sentence))
+            if len(sentence) > len(stats["longest"]):
+                stats["longest"] = sentence
+            matches.append(rule_matches)
+        return Glue.indexes(phase, matches)
+
+    def nobr(self, sentence: str) -> list:
+        return self.__indexes("nobr", sentence)
+
+    def nbsp(self, sentence: str) -> list:
+        return self.__indexes("nbsp", sentence)
+
+    def span(self, sentence: str) -> list:
+        return self.__indexes("span", sentence)
+
+    def rework(self, text: str, nobr_enabled: bool = True) -> str:
+        """
+        Rework text by rules from typograph and measure the rules
+        :param text: text to rework
+        :param nobr_enabled: allow nobr additions
+        :return: resulted text
+        """
+        return _ProfiledText(text, self).do_typograf(nobr_enabled)
+
+    @staticmethod
+    def __best_time(rule: dict, phase: str, sentence: str, repeat: int = 3) -> float:
+        """
+        Get the best time of search of rule in text
+        :param rule: rule of typograph
+        :param phase: nobr, nbsp or span
+        :param sentence: text to search in
+        :param repeat: number of measurements, a measurement longer than PROBE_TIME_LIMIT is not repeated
+        :return: time in seconds
+        """
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            Glue.rule_matches(rule, sentence, overlapped=phase == "nbsp")
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            if elapsed > PROBE_TIME_LIMIT:
+                break
+        return best
+
+    def __probe_growth(self, rule: dict, phase: str, sentence: str) -> Optional[float]:
+        """
+        Get exponent of growth of time of rule with length of input
+        The longest text of the rule is repeated up to PROBE_LENGTH symbols and prefixes of it are measured
+        :param rule: rule of typograph
+        :param phase: nobr, nbsp or span
+        :param sentence: the longest text of the rule
+        :return: slope of time by length of prefix in log-log scale or None if the rule is not measured
+        """
+        if sentence.strip() == "":
+            return None
+        probe = " ".join([sentence] * (PROBE_LENGTH // (len(sentence) + 1) + 1))[:PROBE_LENGTH]
+        points = []
+        for divider in PROBE_DIVIDERS:
+            prefix = probe[:PROBE_LENGTH // divider]
+            elapsed = self.__best_time(rule, phase, prefix, PROBE_REPEAT)
+            points.append((math.log(len(prefix)), math.log(max(elapsed, 1e-9))))
+            if elapsed > PROBE_TIME_LIMIT:  # longer prefixes could take too long for a bad rule
+                break
+        if len(points) < 2:
+            return None
+        mean_x = sum([x for x, _ in points]) / len(points)
+        mean_y = sum([y for _, y in points]) / len(points)
+        return sum([(x - mean_x) * (y - mean_y) for x, y in points]) / sum([(x - mean_x) ** 2 for x, _ in points])
+
+    def report(self) -> list:
+        """
+        Get measurements of rules
+        Rule is superlinear if its time grows faster than length ** SUPERLINEAR_EXPONENT
+        on long inputs made of its longest text
+        :return: list of measurements of rules from the most expensive one
+                 [{"phase", "name", "pattern", "time", "calls", "matches", "worst": {"time", "length", "text"},
+                   "growth", "superlinear"}]
+        """
+        rules = []
+        for (phase, name), stats in self.stats.items():
+            worst = None
+            for _, _, sentence in stats["candidates"]:
+                elapsed = self.__best_time(stats["rule"], phase, sentence)
+                if worst is None or elapsed > worst["time"]:
+                    worst = {"time": elapsed, "length": len(sentence), "text": sentence}
+            growth = self.__probe_growth(stats["rule"], phase, stats["longest"])
+            rules.append({
+                "phase": phase,
+                "name": name,
+                "pattern": stats["rule"]["source"],
+                "time": stats["time"],
+                "calls": stats["calls"],
+                "matches": stats["matches"],
+                "worst": worst,
+                "growth": growth,
+                "superlinear": growth is not None and growth > SUPERLINEAR_EXPONENT,
+            })
+        return sorted(rules, key=lambda x: x["time"], reverse=True)
+
+
+class _ProfiledText(VText):
+    __slots__ = ("profiler",)
+
+    def __init__(self, text: str, profiler: RuleProfiler):
+        """
+        Text which is reworked by measured ruleset
+        :param text: text of element
+        :param profiler: measured ruleset
+        """
+        super(_ProfiledText, self).__init__(text)
+        self.profiler = profiler
+
+    @property
+    def glue(self) -> RuleProfiler:
+        return self.profiler
+
+
+def profile_rules(paths: list, glue: Optional[Glue] = None, failed: Optional[dict] = None) -> list:
+    """
+    Measure every rule of typograph on texts of docx files
+    :param paths: docx files paths
+    :param glue: ruleset to measure, the shared ruleset by default
+    :param failed: dictionary which gets error messages of files which can't be parsed by their paths,
+                   errors are raised if it is not given
+    :return: list of measurements of rules on the rest of files (see RuleProfiler.report)
+    """
+    profiler = RuleProfiler(glue)
+    for path in paths:
+        try:
+            document = VDocument.from_file(path, streaming=True, keep_raw=False)
+        except Exception as error:
+            if failed is None:
+                raise
+            failed[path] = f"{type(error).__name__}: {error}"
+            continue
+        nodes = document.typograf_nodes()
+        del document
+        # pauses of garbage collector would be measured as time of rules
+        gc.disable()
+        try:
+            for part, nobr_enabled, _ in nodes:
+                profiler.rework(part.text, nobr_enabled)
+        finally:
+            gc.enable()
+    return profiler.report()
+
+
+def format_rules_report(rules: list, text_length: int = 60) -> str:
+    """
+    Get table of measurements of rules
+    :param rules: measurements of rules from profile_rules
+    :param text_length: number of symbols of the worst inputs in the table
+    :return: text of the table
+    """
+    lines = [f"{'rule':<32}{'phase':<7}{'time, ms':>10}{'calls':>9}{'matches':>9}{'growth':>8}  worst input"]
+    for rule in rules:
+        growth = "" if rule["growth"] is None else f"{rule['growth']:.2f}"
+        worst = ""
+        if rule["worst"] is not None:
+            text = rule["worst"]["text"].replace("\n", " ")
+            if len(text) > text_length:
+                text = f"{text[:text_length]}..."
+            worst = f"{rule['worst']['time'] * 1000:.3f} ms, {rule['worst']['length']} symbols: {text}"
+        flag = " SUPERLINEAR" if rule["superlinear"] else ""
+        lines.append(f"{rule['name']:<32}{rule['phase']:<7}{rule['time'] * 1000:>10.2f}{rule['calls']:>9}"
+                     f"{rule['matches']:>9}{growth:>8}  {worst}{flag}")
+    return "\n".join(lines)
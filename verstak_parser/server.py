@@ -0,0 +1,331 @@
+import os
+import sys
+import signal
+import asyncio
+import multiprocessing
+import urllib.parse
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .VDocument import VDocument
+from .typograf import get_glue
+
+# pages of the service are installed with the package
+FRONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "front")
+
+
+def init_worker():
+    """
+    Prepare worker process for conversions
+    """
+    # progress bars of workers are not shown anywhere
+    VDocument.SHOW_PROGRESS = False
+    get_glue()
+
+
+def warm_up() -> int:
+    """
+    Task which makes pool start its worker
+    :return: process id of the worker
+    """
+    return os.getpid()
+
+
+def convert_docx(data: bytes, tipograf_enabled: bool = True, allow_header_links: bool = False,
+                 skip_tables: bool = False) -> bytes:
+    """
+    Convert docx document to html
+    :param data: content of docx file
+    :param tipograf_enabled: rework text by rules from typograph
+    :param allow_header_links: allows links to be added for headers/titles
+    :param skip_tables: adds stub instead of big tables
+    :return: html encoded as utf-8 like it is stored by VDocument.store_html
+    """
+    html = next(VDocument.convert_many([data], tipograf_enabled, allow_header_links, skip_tables))
+    return html.encode("utf-8")
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, reason: str, message: str = "", headers: Optional[dict] = None):
+        """
+        Error which is sent to the client as a response
+        :param status: status code of response
+        :param reason: reason phrase of response
+        :param message: text of response
+        :param headers: additional headers of response
+        """
+        super(HTTPError, self).__init__(f"{status} {reason}: {message}")
+        self.status = status
+        self.reason = reason
+        self.message = message
+        self.headers = headers if headers is not None else {}
+
+
+class ConversionServer:
+    CHUNK_SIZE = 1 << 16
+    MAX_HEADERS_SIZE = 1 << 16
+    CONTENT_TYPES = {
+        ".html": "text/html; charset=utf-8",
+        ".css": "text/css; charset=utf-8",
+        ".js": "application/javascript; charset=utf-8",
+        ".svg": "image/svg+xml",
+        ".png": "image/png",
+        ".ico": "image/x-icon",
+    }
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8000, jobs: Optional[int] = None,
+                 max_queue: int = 32, max_upload: int = 50 << 20, front_dir: Optional[str] = FRONT_DIR,
+                 read_timeout: float = 30.0):
+        """
+        HTTP service which converts uploaded docx files to html in a pool of worker processes
+        POST /convert with docx file as a body of request returns html,
+        flags of conversion are given in query like options of verstak command (t=1, ah=1, st=1).
+        Files of front directory are served for GET requests, / is main.html.
+        :param host: host to listen on
+        :param port: port to listen on
+        :param jobs: number of worker processes and conversions at once, number of CPUs by default
+        :param max_queue: number of uploads which wait for a worker, the rest are rejected with 503,
+                          uploads are not rejected while a worker is free
+        :param max_upload: maximal size of uploaded file in bytes
+        :param front_dir: directory with pages of the service or None to serve conversions only
+        :param read_timeout: seconds to wait for headers or body of request, 408 is answered after them
+        """
+        self.host = host
+        self.port = port
+        self.jobs = jobs if jobs is not None else (os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self.max_upload = max_upload
+        self.front_dir = front_dir
+        self.read_timeout = read_timeout
+        self.__pool = None
+        self.__pool_lock = None
+        self.__admission = None
+        self.__waiting = 0
+
+    def __new_pool(self) -> ProcessPoolExecutor:
+        """
+        Start pool of worker processes with compiled rules of typograph
+        :return: pool of worker processes
+        """
+        get_glue()  # rules are compiled before workers are forked to be shared with them
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+        pool = ProcessPoolExecutor(max_workers=self.jobs, mp_context=context, initializer=init_worker)
+        for _ in range(self.jobs):
+            pool.submit(warm_up)
+        return pool
+
+    async def __replace_pool(self, failed: ProcessPoolExecutor) -> bool:
+        """
+        Start new pool of worker processes instead of the failed one
+        Requests which fail with the same pool at once replace it only once
+        :param failed: pool which is broken
+        :return: True if the pool is replaced by this call, False if it is replaced already
+        """
+        async with self.__pool_lock:
+            if self.__pool is not failed:
+                return False
+            self.__pool = self.__new_pool()
+        failed.shutdown(wait=False)
+        return True
+
+    async def serve_forever(self):
+        """
+        Start workers and serve requests until the task is cancelled or SIGTERM is received
+        """
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, RuntimeError):  # signals can't be handled by the loop on Windows
+            pass
+        self.__pool = self.__new_pool()
+        self.__pool_lock = asyncio.Lock()
+        # uploads are read only when a worker is free for them, the rest wait in the queue
+        self.__admission = asyncio.Semaphore(self.jobs)
+        server = await asyncio.start_server(self.handle, self.host, self.port, limit=self.MAX_HEADERS_SIZE)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if sys.version_info >= (3, 9):
+                self.__pool.shutdown(cancel_futures=True)
+            else:  # waiting conversions are not cancelled before python 3.9
+                self.__pool.shutdown()
+
+    def run(self):
+        """
+        Serve requests until the process is interrupted or terminated
+        """
+        try:
+            asyncio.run(self.serve_forever())
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Handle one request of the connection
+        :param reader: stream of the request
+        :param writer: stream of the response
+        """
+        try:
+            try:
+                method, path, query, headers = await self.__read_request(reader, self.read_timeout)
+                if path == "/convert":
+                    await self.__convert(reader, writer, method, query, headers)
+                else:
+                    await self.__static(writer, method, path)
+            except HTTPError as error:
+                await self.__send(writer, error.status, error.reason, "text/plain; charset=utf-8",
+                                  f"{error.message}\n".encode("utf-8"), error.headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def __read(read, timeout: float):
+        """
+        Read from stream of request with timeout
+        :param read: awaitable read of the stream
+        :param timeout: seconds to wait for the data
+        :return: result of the read
+        """
+        try:
+            return await asyncio.wait_for(read, timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(408, "Request Timeout", "Request is not received in time")
+
+    @staticmethod
+    async def __read_request(reader: asyncio.StreamReader, timeout: float) -> tuple:
+        """
+        Read request line and headers
+        :param reader: stream of the request
+        :param timeout: seconds to wait for the headers
+        :return: method, path, query parameters and headers with lower case names
+        """
+        try:
+            head = await ConversionServer.__read(reader.readuntil(b"\r\n\r\n"), timeout)
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "Request Header Fields Too Large")
+        lines = head.decode("latin-1").split("\r\n")
+        request_line = lines[0].split(" ")
+        if len(request_line) != 3:
+            raise HTTPError(400, "Bad Request", "Malformed request line")
+        method, target, _ = request_line
+        url = urllib.parse.urlsplit(target)
+        headers = {}
+        for line in lines[1:]:
+            if line == "":
+                continue
+            name, separator, value = line.partition(":")
+            if separator == "":
+                raise HTTPError(400, "Bad Request", "Malformed header")
+            headers[name.strip().lower()] = value.strip()
+        query = dict(urllib.parse.parse_qsl(url.query))
+        return method, urllib.parse.unquote(url.path), query, headers
+
+    async def __send(self, writer: asyncio.StreamWriter, status: int, reason: str, content_type: str,
+                     body: bytes, headers: Optional[dict] = None):
+        """
+        Send response by chunks
+        :param writer: stream of the response
+        :param status: status code
+        :param reason: reason phrase
+        :param content_type: type of the body
+        :param body: body of the response
+        :param headers: additional headers
+        """
+        head = [f"HTTP/1.1 {status} {reason}", f"Content-Type: {content_type}",
+                f"Content-Length: {len(body)}", "Connection: close"]
+        if headers is not None:
+            head.extend([f"{name}: {value}" for name, value in headers.items()])
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        view = memoryview(body)
+        for start in range(0, len(body), self.CHUNK_SIZE):
+            writer.write(view[start:start + self.CHUNK_SIZE])
+            await writer.drain()
+        await writer.drain()
+
+    async def __static(self, writer: asyncio.StreamWriter, method: str, path: str):
+        """
+        Send file from front directory
+        :param writer: stream of the response
+        :param method: method of the request
+        :param path: path of the request
+        """
+        if method != "GET":
+            raise HTTPError(405, "Method Not Allowed", headers={"Allow": "GET"})
+        name = "main.html" if path == "/" else path.lstrip("/")
+        if self.front_dir is None or "/" in name or name.startswith("."):
+            raise HTTPError(404, "Not Found")
+        file_path = os.path.join(self.front_dir, name)
+        if not os.path.isfile(file_path):
+            raise HTTPError(404, "Not Found")
+        with open(file_path, "rb") as static_file:
+            body = static_file.read()
+        content_type = self.CONTENT_TYPES.get(os.path.splitext(name)[1], "application/octet-stream")
+        await self.__send(writer, 200, "OK", content_type, body)
+
+    async def __convert(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str,
+                        query: dict, headers: dict):
+        """
+        Convert uploaded docx file and send html
+        :param reader: stream of the request
+        :param writer: stream of the response
+        :param method: method of the request
+        :param query: query parameters of the request
+        :param headers: headers of the request
+        """
+        if method != "POST":
+            raise HTTPError(405, "Method Not Allowed", headers={"Allow": "POST"})
+        if "content-length" not in headers:
+            raise HTTPError(411, "Length Required")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HTTPError(400, "Bad Request", "Malformed Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Bad Request", "Malformed Content-Length")
+        if length > self.max_upload:
+            raise HTTPError(413, "Payload Too Large", f"File should be smaller than {self.max_upload} bytes")
+        if self.__admission.locked() and self.__waiting >= self.max_queue:
+            raise HTTPError(503, "Service Unavailable", "Too many files are being converted",
+                            {"Retry-After": "5"})
+        options = (query.get("t", "0") != "1", query.get("ah", "0") == "1", query.get("st", "0") == "1")
+        name = os.path.basename(query.get("name", "result.docx"))
+        self.__waiting += 1
+        admitted = False
+        try:
+            await self.__admission.acquire()
+            admitted = True
+            self.__waiting -= 1
+            # the client sends the file after it is admitted
+            if headers.get("expect", "").lower() == "100-continue":
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                await writer.drain()
+            data = await self.__read(reader.readexactly(length), self.read_timeout)
+            pool = self.__pool
+            try:
+                html = await asyncio.get_running_loop().run_in_executor(pool, convert_docx, data, *options)
+            except BrokenProcessPool:
+                if await self.__replace_pool(pool):
+                    raise HTTPError(500, "Internal Server Error", "Worker of conversion is failed")
+                # conversions which are broken along with another one can be tried again on the new pool
+                raise HTTPError(503, "Service Unavailable", "Worker of conversion is restarted",
+                                {"Retry-After": "1"})
+            except Exception as error:
+                raise HTTPError(422, "Unprocessable Entity", f"{type(error).__name__}: {error}")
+            filename = urllib.parse.quote(f"{name}.html")
+            await self.__send(writer, 200, "OK", "text/html; charset=utf-8", html,
+                              {"Content-Disposition": f"attachment; filename*=UTF-8''{filename}"})
+        finally:
+            if admitted:
+                self.__admission.release()
+            else:
+                self.__waiting -= 1
@@ -0,0 +1,112 @@
+class EditBuffer:
+    def __init__(self, text: str = ""):
+        """
+        Text with a list of edits in coordinates of the original text
+        Edits are given in coordinates of the current text and the result is built with one join
+        :param text: original text
+        """
+        self.original = text
+        # sorted segments of the current text (start, end, replacement) where replacement is None
+        # for a slice of the original text and a string which replaces original[start:end] otherwise
+        self.__segments = [(0, len(text), None)] if len(text) > 0 else []
+        self.__text = text
+
+    def __str__(self):
+        return self.text
+
+    def __len__(self):
+        return len(self.text)
+
+    @staticmethod
+    def __length(segment: tuple) -> int:
+        """
+        Get length of segment in the current text
+        :param segment: segment of the current text
+        :return: length of the segment
+        """
+        if segment[2] is None:
+            return segment[1] - segment[0]
+        return len(segment[2])
+
+    @property
+    def text(self) -> str:
+        """
+        Current text with all edits applied
+        :return: current text
+        """
+        if self.__text is None:
+            original = self.original
+            self.__text = "".join([original[start:end] if replacement is None else replacement
+                                   for start, end, replacement in self.__segments])
+        return self.__text
+
+    @property
+    def edits(self) -> list:
+        """
+        Applied edits in coordinates of the original text
+        :return: sorted list of edits [(start, end, replacement), (start, end, replacement)]
+        """
+        return [segment for segment in self.__segments if segment[2] is not None]
+
+    def apply(self, edits: list) -> str:
+        """
+        Apply edits given in coordinates of the current text
+        Edits at the same position are applied in the given order.
+        Edits which touch already replaced parts of the text are merged with them.
+        :param edits: sorted list of not overlapped edits [(start, end, replacement), (start, end, replacement)]
+        :return: current text
+        """
+        if len(edits) == 0:
+            return self.text
+        segments = []
+        old_segments = self.__segments
+        index = 0
+        current = old_segments[0] if len(old_segments) > 0 else None
+        position = 0  # position of the current segment in the current text
+        for start, end, replacement in edits:
+            # segments before the edit are not changed
+            while current is not None and position + self.__length(current) <= start:
+                segments.append(current)
+                position += self.__length(current)
+                index += 1
+                current = old_segments[index] if index < len(old_segments) else None
+            prefix = ""
+            inside = False  # the edit starts inside of a replaced part of the text
+            if current is None:
+                edit_start = len(self.original)
+            elif current[2] is None:
+                edit_start = current[0] + start - position
+                if start > position:
+                    segments.append((current[0], edit_start, None))
+                    current = (edit_start, current[1], None)
+                    position = start
+            else:
+                edit_start = current[0]
+                prefix = current[2][:start - position]
+                inside = start > position
+            edit_end = edit_start
+            # segments covered by the edit are merged into it,
+            # the rest of a replaced part of the text after the edit stays in its own segment
+            while current is not None and (position < end or inside):
+                inside = False
+                length = self.__length(current)
+                if position + length > end:
+                    if current[2] is None:
+                        edit_end = current[0] + end - position
+                        current = (edit_end, current[1], None)
+                    else:
+                        edit_end = current[0]
+                        current = (current[0], current[1], current[2][end - position:])
+                    position = end
+                    break
+                edit_end = current[1]
+                position += length
+                index += 1
+                current = old_segments[index] if index < len(old_segments) else None
+            segments.append((edit_start, edit_end, f"{prefix}{replacement}"))
+        if current is not None:
+            segments.append(current)
+            segments.extend(old_segments[index + 1:])
+        self.__segments = segments
+        self.__text = None
+        return self.text
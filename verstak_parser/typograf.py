@@ -1,46 +1,265 @@
-import regex as re
 import configparser
+import hashlib
+import sys
+import threading
+import time
 import os
+from collections import OrderedDict
+from typing import Optional
 
 config_dir = os.path.dirname(os.path.realpath(__file__))
-configs = [f"{config_dir}{os.sep}default_tipograf.ini"]
-if os.getenv("VERSTAK_CONFIG") is not None:
-    configs.append(os.getenv("VERSTAK_CONFIG"))
-config = configparser.ConfigParser()
-config.read(configs)
+# how often (in seconds) configure files are checked for changes on disk
+RELOAD_CHECK_INTERVAL = 1.0
+# shared rulesets are compiled in combined mode (see Glue.__init__)
+COMBINED_MATCHING = False
+# patterns which refer to their groups by numbers or change flags can't be merged with other patterns
+_NOT_COMBINABLE = r"\\[1-9]|\\g<|\(\?P=|\(\?\(|\(\?[&R0-9+-]|\(\?[a-zA-Z]+[:)]"
+# number of texts whose results of tipograf are kept by the shared cache
+TYPOGRAF_CACHE_SIZE = 8192
+# texts are joined with this separator to be searched together
+BATCH_SEPARATOR = "\n"
+# patterns which look outside of their matches can't be searched in many texts joined together
+_NOT_BATCHABLE = r"\(\?<?[=!]|\\[AZzGK]"
+
+
+def _regex():
+    """
+    Get regex module, it is imported with the first compiled ruleset to keep start of the command fast
+    :return: regex module
+    """
+    import regex
+    return regex
+
+
+def configs_paths() -> list:
+    """
+    Get paths of configure files for tipograf
+    :return: path of default configure file and path from VERSTAK_CONFIG if it is set
+    """
+    paths = [f"{config_dir}{os.sep}default_tipograf.ini"]
+    if os.getenv("VERSTAK_CONFIG") is not None:
+        paths.append(os.getenv("VERSTAK_CONFIG"))
+    return paths
 
 
 class Glue:
-    def __init__(self):
-        self.__span_patterns = []
-        self.__nbsp_patterns = []
-        self.__nobr_patterns = []
-        self.__configs = configs
+    def __init__(self, config: configparser.ConfigParser = None, configs: list = None, digest: str = "",
+                 combined: bool = False):
+        """
+        Compiled set of tipograf rules
+        Use get_glue() to get the shared ruleset instead of creating a new one
+        :param config: parsed configuration, configure files are read if it is not provided
+        :param configs: paths of configure files the configuration was read from
+        :param digest: hash of contents of configure files
+        :param combined: scan text once per phase with all rules of the phase merged together
+                         (gives the same indexes, but the regex engine loses its per-rule optimizations
+                         on the merged pattern, so it is faster only for very short texts)
+        """
+        re = _regex()
+        flags = re.MULTILINE | re.IGNORECASE
+        if configs is None:
+            configs = configs_paths()
+        if config is None:
+            config = configparser.ConfigParser()
+            config.read(configs)
+        span_patterns = []
+        nbsp_patterns = []
+        nobr_patterns = []
+        self.__configs = tuple(configs)
+        self.digest = digest
         self.NBSP = config["DEFAULT"]["NBSP"]
         for key in config:
             if key == "DEFAULT":
                 continue
             if "pattern" not in config[key] or "group" not in config[key]:
                 print(f"WARNING: Section {key} in configure file has wrong format, "
-                      f"continuing without it")
+                      f"continuing without it", file=sys.stderr)
                 continue
+            source = config[key]['pattern'].strip().format(NBSP=self.NBSP)
             pattern = {
+                "name": key,
                 "group": int(config[key]['group']),
-                "pattern": re.compile(config[key]['pattern'].strip().format(NBSP=self.NBSP),
-                                      re.MULTILINE | re.IGNORECASE)
+                "source": source,
+                "pattern": re.compile(source, flags)
             }
             if key.startswith("SPAN"):
-                self.__span_patterns.append(pattern)
+                span_patterns.append(pattern)
             elif key.startswith("NBSP"):
-                self.__nbsp_patterns.append(pattern)
+                nbsp_patterns.append(pattern)
             elif key.startswith("NOBR"):
-                self.__nobr_patterns.append(pattern)
+                nobr_patterns.append(pattern)
             else:
                 print(f"WARNING: Section {key} in configure file has wrong format, "
-                      f"continuing without it")
+                      f"continuing without it", file=sys.stderr)
+        self.__span_patterns = tuple(span_patterns)
+        self.__nbsp_patterns = tuple(nbsp_patterns)
+        self.__nobr_patterns = tuple(nobr_patterns)
+        self.combined = combined
+        # texts joined with BATCH_SEPARATOR give the same matches inside of every text
+        # as long as matches don't touch the separator
+        self.batchable = all(re.search(_NOT_BATCHABLE, pattern["source"]) is None
+                             for pattern in self.__span_patterns + self.__nbsp_patterns + self.__nobr_patterns)
+        self.__span_matcher = self.__combine(self.__span_patterns) if combined else None
+        self.__nbsp_matcher = self.__combine(self.__nbsp_patterns) if combined else None
+        self.__nobr_matcher = self.__combine(self.__nobr_patterns) if combined else None
+
+    def configs_paths(self) -> list:
+        """
+        Get paths of configure files used for this ruleset
+        :return: list of paths
+        """
+        return list(self.__configs)
+
+    def rules(self, phase: str) -> tuple:
+        """
+        Get rules of a phase in the order they are searched
+        :param phase: nobr, nbsp or span
+        :return: rules {"name": section, "group": group, "source": pattern, "pattern": compiled pattern}
+        """
+        if phase == "nobr":
+            return self.__nobr_patterns
+        elif phase == "nbsp":
+            return self.__nbsp_patterns
+        elif phase == "span":
+            return self.__span_patterns
+        raise Exception(f"Phase ({phase}) is not known")
+
+    def __combine(self, patterns: tuple) -> Optional[dict]:
+        """
+        Merge rules of one phase into a single alternation with named groups
+        Rules with backreferences, inline flags or wrong group numbers are searched separately
+        :param patterns: rules of the phase
+        :return: {"pattern": alternation, "rules": [(index of rule, group of rule in alternation)],
+                  "order": {group of rule in alternation: position in rules}, "separate": {indexes of rules}}
+                 or None if rules can't be merged
+        """
+        re = _regex()
+        rules = []
+        separate = set()
+        alternatives = []
+        for index, pattern in enumerate(patterns):
+            if re.search(_NOT_COMBINABLE, pattern["source"]) is not None or \
+                    not 0 <= pattern["group"] <= pattern["pattern"].groups:
+                separate.add(index)
+                continue
+            rules.append(index)
+            alternatives.append(f"(?P<verstak_rule_{index}>{pattern['source']})")
+        if len(rules) == 0:
+            return None
+        try:
+            combined = re.compile("|".join(alternatives), re.MULTILINE | re.IGNORECASE)
+        except re.error:
+            return None
+        if combined.groups != sum(patterns[index]["pattern"].groups + 1 for index in rules):
+            return None  # groups with the same names are shared between alternatives
+        groups = [(index, combined.groupindex[f"verstak_rule_{index}"]) for index in rules]
+        return {
+            "pattern": combined,
+            "rules": groups,
+            "order": {group: order for order, (_, group) in enumerate(groups)},
+            "separate": separate
+        }
+
+    @staticmethod
+    def rule_matches(pattern: dict, sentence: str, overlapped: bool = False) -> list:
+        """
+        Find matches of one rule in text
+        :param pattern: rule to search with
+        :param sentence: text to search in
+        :param overlapped: search for overlapped matches
+        :return: list of matches [(start, end, start of group, end of group)]
+        """
+        matches = []
+        founds = pattern['pattern'].finditer(sentence, overlapped=overlapped)
+        if founds is not None:
+            for search in founds:
+                matches.append((search.start(), search.end(),
+                                search.start(pattern['group']), search.end(pattern['group'])))
+        return matches
+
+    def __matches(self, patterns: tuple, matcher: Optional[dict], sentence: str, overlapped: bool = False) -> list:
+        """
+        Find matches of all rules of a phase in text
+        Combined matcher scans text once and gives the same result as searching rule by rule
+        :param patterns: rules of the phase
+        :param matcher: combined matcher of the phase or None to search rule by rule
+        :param sentence: text to search in
+        :param overlapped: search for overlapped matches
+        :return: list of matches [(start, end, start of group, end of group)] for every rule
+        """
+        if matcher is None:
+            return [self.rule_matches(pattern, sentence, overlapped) for pattern in patterns]
+        rules = matcher["rules"]
+        candidates = [[] for _ in patterns]
+        # the alternation returns the first rule matching at a position,
+        # the following rules are checked at the same position separately
+        for search in matcher["pattern"].finditer(sentence, overlapped=True):
+            position = search.start()
+            first = matcher["order"][search.lastindex]
+            for order in range(first, len(rules)):
+                index, group = rules[order]
+                if order == first:
+                    found = search
+                    group += patterns[index]["group"]
+                else:
+                    found = patterns[index]["pattern"].match(sentence, position)
+                    if found is None:
+                        continue
+                    group = patterns[index]["group"]
+                if found.end() == position:  # empty matches are left to the search rule by rule
+                    return self.__matches(patterns, None, sentence, overlapped)
+                candidates[index].append((position, found.end(), found.start(group), found.end(group)))
+        matches = []
+        for index, pattern in enumerate(patterns):
+            if index in matcher["separate"]:
+                matches.append(self.rule_matches(pattern, sentence, overlapped))
+                continue
+            rule_matches = []
+            search_from = 0
+            for candidate in candidates[index]:
+                if not overlapped and candidate[0] < search_from:
+                    continue
+                search_from = candidate[1]
+                rule_matches.append(candidate)
+            matches.append(rule_matches)
+        return matches
 
-    def configs_paths(self):
-        return self.__configs
+    def matches(self, phase: str, sentence: str) -> list:
+        """
+        Find matches of all rules of a phase in text
+        :param phase: nobr, nbsp or span
+        :param sentence: text to search in
+        :return: list of matches [(start, end, start of group, end of group)] for every rule
+        """
+        if phase == "nobr":
+            return self.__matches(self.__nobr_patterns, self.__nobr_matcher, sentence)
+        elif phase == "nbsp":
+            return self.__matches(self.__nbsp_patterns, self.__nbsp_matcher, sentence, overlapped=True)
+        elif phase == "span":
+            return self.__matches(self.__span_patterns, self.__span_matcher, sentence)
+        raise Exception(f"Phase ({phase}) is not known")
+
+    @staticmethod
+    def indexes(phase: str, matches: list) -> list:
+        """
+        Get indexes of a phase from matches of its rules
+        :param phase: nobr, nbsp or span
+        :param matches: list of matches [(start, end, start of group, end of group)] for every rule
+        :return: list of indexes for nbsp [index1, index2] and [[start, end], [start, end]] for nobr and span
+        """
+        if phase == "nbsp":
+            indexes = set()
+            for rule_matches in matches:
+                for match in rule_matches:
+                    if match[2] >= 0:
+                        indexes.add(match[2])
+            return list(indexes)
+        spans = []
+        for rule_matches in matches:
+            for match in rule_matches:
+                if match[2] >= 0:
+                    spans.append([match[2], match[3]])
+        return spans
 
     def span(self, sentence) -> list:
         """
@@ -48,15 +267,7 @@ class Glue:
         :param sentence: text to get indexes from
         :return: list of indexes where it needs to wrap [[start, end], [start, end]]
         """
-        span_indexes = []
-        for pattern in self.__span_patterns:
-            founds = pattern['pattern'].finditer(sentence)
-            if founds is not None:
-                for search in founds:
-                    if search.start(pattern['group']) >= 0:
-                        span_indexes.append([search.start(pattern['group']),
-                                             search.end(pattern['group'])])
-        return span_indexes
+        return self.indexes("span", self.matches("span", sentence))
 
     def nobr(self, sentence) -> list:
         """
@@ -64,15 +275,7 @@ class Glue:
         :param sentence: text to get indexes from
         :return: list of indexes where it needs to wrap [[start, end], [start, end]]
         """
-        nobr_indexes = []
-        for pattern in self.__nobr_patterns:
-            founds = pattern['pattern'].finditer(sentence)
-            if founds is not None:
-                for search in founds:
-                    if search.start(pattern['group']) >= 0:
-                        nobr_indexes.append([search.start(pattern['group']),
-                                             search.end(pattern['group'])])
-        return nobr_indexes
+        return self.indexes("nobr", self.matches("nobr", sentence))
 
     def nbsp(self, sentence) -> list:
         """
@@ -80,18 +283,215 @@ class Glue:
         :param sentence: text to get indexes from
         :return: list of indexes where it needs to replace [index1, index2]
         """
-        indexes = set()
-        for pattern in self.__nbsp_patterns:
-            founds = pattern['pattern'].finditer(sentence, overlapped=True)
-            if founds is not None:
-                for search in founds:
-                    if search.start(pattern['group']) >= 0:
-                        indexes.add(search.start(pattern['group']))
-        return list(indexes)
+        return self.indexes("nbsp", self.matches("nbsp", sentence))
+
+
+class _SharedGlue:
+    """
+    Process-wide cache of compiled rulesets keyed by contents of configure files
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rulesets = {}
+        self.current = None
+        self.signature = None
+        self.checked = 0.0
+
+    @staticmethod
+    def stat(paths: list) -> tuple:
+        """
+        Get cheap signature of configure files which changes when files are changed on disk
+        :param paths: paths of configure files
+        :return: tuple of (path, mtime, size) for every path
+        """
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def load(self, paths: list) -> Glue:
+        """
+        Read configure files and get compiled ruleset for their contents
+        :param paths: paths of configure files
+        :return: compiled ruleset
+        """
+        contents = []
+        for path in paths:
+            try:
+                with open(path, "rb") as config_file:
+                    contents.append(config_file.read())
+            except OSError:  # missing files are skipped like ConfigParser.read does
+                contents.append(None)
+        digest = hashlib.sha1(repr(list(zip(paths, contents))).encode()).hexdigest()
+        if digest not in self.rulesets:
+            config = configparser.ConfigParser()
+            for path, content in zip(paths, contents):
+                if content is not None:
+                    config.read_string(content.decode("utf-8"), path)
+            if len(self.rulesets) >= 8:  # old versions of configure files are not needed anymore
+                self.rulesets.pop(next(iter(self.rulesets)))
+            self.rulesets[digest] = Glue(config, paths, digest, COMBINED_MATCHING)
+        return self.rulesets[digest]
+
+    def get(self) -> Glue:
+        """
+        Get compiled ruleset for current configure files
+        :return: compiled ruleset
+        """
+        now = time.monotonic()
+        if self.current is not None and now - self.checked < RELOAD_CHECK_INTERVAL:
+            return self.current
+        with self.lock:
+            paths = configs_paths()
+            signature = self.stat(paths)
+            if self.current is None or signature != self.signature:
+                self.current = self.load(paths)
+                self.signature = signature
+            self.checked = now
+            return self.current
+
+
+_shared_glue = _SharedGlue()
+
+
+def get_glue() -> Glue:
+    """
+    Get shared compiled ruleset of tipograf
+    Ruleset is compiled once per contents of configure files
+    and is reloaded when configure files are changed on disk
+    :return: compiled ruleset
+    """
+    return _shared_glue.get()
+
+
+class TypografCache:
+    """
+    Process-wide LRU cache of results of tipograf shared by all documents
+    """
+    def __init__(self, size: int = TYPOGRAF_CACHE_SIZE):
+        """
+        :param size: maximal number of kept results, 0 disables the cache
+        """
+        self.lock = threading.Lock()
+        self.size = size
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(glue, text: str, nobr_enabled: bool, picture: bool) -> Optional[tuple]:
+        """
+        Get key of result of tipograf
+        :param glue: ruleset which reworks the text
+        :param text: text before tipograf
+        :param nobr_enabled: allow nobr additions
+        :param picture: text is a picture caption (its nobr tags are html ones)
+        :return: key or None if results of the ruleset are not cached (ruleset without digest of configure files)
+        """
+        digest = getattr(glue, "digest", "")
+        if not digest:
+            return None
+        return digest, text, nobr_enabled, picture
+
+    def get(self, key: Optional[tuple]) -> Optional[str]:
+        """
+        Get cached result of tipograf
+        :param key: key from TypografCache.key
+        :return: resulted text or None if it is not cached
+        """
+        if key is None or self.size <= 0:
+            return None
+        with self.lock:
+            text = self.results.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self.results.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key: Optional[tuple], text: str):
+        """
+        Keep result of tipograf, the least recently used results are dropped
+        :param key: key from TypografCache.key
+        :param text: resulted text
+        """
+        if key is None or self.size <= 0:
+            return
+        with self.lock:
+            self.results[key] = text
+            self.results.move_to_end(key)
+            while len(self.results) > self.size:
+                self.results.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop cached results and reset counters
+        """
+        with self.lock:
+            self.results.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def snapshot(self) -> tuple:
+        """
+        Get copy of the state of the cache
+        :return: state for TypografCache.restore
+        """
+        with self.lock:
+            return OrderedDict(self.results), self.hits, self.misses
+
+    def restore(self, state: tuple):
+        """
+        Return the cache to the state from TypografCache.snapshot
+        :param state: state of the cache
+        """
+        results, hits, misses = state
+        with self.lock:
+            self.results = OrderedDict(results)
+            self.hits = hits
+            self.misses = misses
+
+    def stats(self) -> dict:
+        """
+        Get counters of the cache
+        :return: numbers of kept results, hits and misses
+        """
+        with self.lock:
+            return {"size": len(self.results), "max_size": self.size, "hits": self.hits, "misses": self.misses}
+
+
+_typograf_cache = TypografCache()
+
+
+def get_typograf_cache() -> TypografCache:
+    """
+    Get shared cache of results of tipograf
+    Results are kept by texts, nobr flag, kind of text and digest of configure files,
+    so changed configure files don't give stale results
+    :return: cache of results of tipograf
+    """
+    return _typograf_cache
 
 
 if __name__ == "__main__":
     from verstak_parser.VText import VText
+    # combined matcher should find the same indexes as the search rule by rule
+    rules_glue = Glue()
+    combined_glue = Glue(combined=True)
+    for sentence in ["678 678 фывфыв", "678,67 млн долларов", "что-нибудь я сделаю", "Как бы я хотел этого",
+                     "1,5—2 часа", "много денег 12 009 — 17 877 ₽ или мало", "бла-бла, и т. д., и т.п.",
+                     "текст 110, если текст", "20:00, но", "это известно в т. ч. как неизвестность",
+                     "Во-первых, это во-вторых", "потому что так как обо мне вне контекста все равно",
+                     "The bar and for all of this", "стр. 123", "Как&nbsp;бы я хотел этого 5 °C"]:
+        assert combined_glue.nobr(sentence) == rules_glue.nobr(sentence), sentence
+        assert combined_glue.nbsp(sentence) == rules_glue.nbsp(sentence), sentence
+        assert combined_glue.span(sentence) == rules_glue.span(sentence), sentence
+
     assert VText("678 678 фывфыв").do_typograf() == "678 678&nbsp;фывфыв", \
         VText("678 678 фывфыв").do_typograf()
     assert VText("678,67 млн долларов").do_typograf() == "678,67&nbsp;млн долларов", \
@@ -105,7 +505,7 @@ if __name__ == "__main__":
     assert VText("1,5—2 часа").do_typograf() == "[nobr]1,5—2 часа[/nobr]", \
         VText("1,5—2 часа").do_typograf()
     assert VText("много денег 12 009 — 17 877 ₽ или мало").do_typograf() == "много денег [nobr]12 009 — 17 877 ₽[/nobr]" \
-                                                                            " или&nbsp;мало", \
+                                                                            " или мало", \
         VText("много денег 12 009 — 17 877 ₽ или мало").do_typograf()
     assert VText("бла-бла, и т. д., и т.п.").do_typograf() == "бла-бла, и [nobr]т. д.[/nobr], и [nobr]т.п.[/nobr]", \
         VText("бла-бла, и т. д., и т.п.").do_typograf()
@@ -0,0 +1,200 @@
+import os
+import sys
+import time
+import select
+import struct
+from typing import Optional
+
+# files are converted when they are not changed for this number of seconds (editors write files in parts)
+DEBOUNCE_DELAY = 0.5
+# how often (in seconds) directory is listed when inotify is not available
+POLL_INTERVAL = 1.0
+
+# events of inotify (see inotify(7))
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_WATCHED = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_IN_EVENT = struct.Struct("iIII")
+
+
+def is_docx(name: str) -> bool:
+    """
+    Check that file of directory is a document to convert
+    :param name: name of the file
+    :return: False for other files, hidden files and lock files of Word (~$name.docx)
+    """
+    return not name.startswith(".") and not name.startswith("~") and name.endswith("docx")
+
+
+def _inotify() -> Optional[object]:
+    """
+    Get libc with inotify functions
+    :return: libc or None if inotify is not available
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, "inotify_init1") or not hasattr(libc, "inotify_add_watch"):
+        return None
+    return libc
+
+
+class DirectoryWatcher:
+    def __init__(self, directory: str, names: Optional[list] = None, debounce: float = DEBOUNCE_DELAY,
+                 poll_interval: float = POLL_INTERVAL, use_inotify: bool = True):
+        """
+        Watcher of docx files of directory
+        Changes are found by inotify on Linux and by listing of the directory otherwise
+        :param directory: directory to watch
+        :param names: names of watched files, all docx files of the directory by default
+        :param debounce: files are reported when they are not changed for this number of seconds
+        :param poll_interval: interval of listing of the directory when inotify is not used
+        :param use_inotify: use inotify if it is available
+        """
+        self.directory = directory
+        self.names = set(names) if names is not None else None
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.fd = None
+        self.pending = {}  # signatures of changed files and times of their last changes by names
+        self.signatures = self.__list()
+        libc = _inotify() if use_inotify else None
+        if libc is not None:
+            fd = libc.inotify_init1(os.O_CLOEXEC)
+            if fd >= 0 and libc.inotify_add_watch(fd, os.fsencode(directory), _IN_WATCHED) >= 0:
+                self.fd = fd
+            elif fd >= 0:
+                os.close(fd)
+
+    @property
+    def backend(self) -> str:
+        """
+        Get the way changes are found
+        :return: inotify or polling
+        """
+        return "inotify" if self.fd is not None else "polling"
+
+    def close(self):
+        """
+        Stop watching
+        """
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __watched(self, name: str) -> bool:
+        """
+        Check that file is watched
+        :param name: name of the file
+        :return: True for watched docx files
+        """
+        return is_docx(name) and (self.names is None or name in self.names)
+
+    def __signature(self, name: str) -> Optional[tuple]:
+        """
+        Get cheap signature of file which changes when the file is written
+        :param name: name of the file
+        :return: mtime and size of the file or None if it doesn't exist
+        """
+        try:
+            stat = os.stat(f"{self.directory}{os.sep}{name}")
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def __list(self) -> dict:
+        """
+        Get signatures of watched files of the directory
+        :return: signatures by names of files
+        """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return {}
+        signatures = {}
+        for name in names:
+            if self.__watched(name):
+                signature = self.__signature(name)
+                if signature is not None:
+                    signatures[name] = signature
+        return signatures
+
+    def __changed(self, timeout: float) -> set:
+        """
+        Wait for changes of files of the directory
+        :param timeout: maximal time of waiting in seconds
+        :return: names of changed watched files
+        """
+        if self.fd is None:
+            time.sleep(timeout)
+            signatures = self.__list()
+            changed = {name for name, signature in signatures.items() if self.signatures.get(name) != signature}
+            self.signatures = signatures
+            return changed
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset + _IN_EVENT.size <= len(data):
+            _, mask, _, length = _IN_EVENT.unpack_from(data, offset)
+            offset += _IN_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & _IN_Q_OVERFLOW:  # events are lost, every file could be changed
+                changed.update(self.__list().keys())
+            elif self.__watched(name):
+                changed.add(name)
+        return changed
+
+    def wait(self, timeout: Optional[float] = None) -> list:
+        """
+        Wait for changed docx files which are written completely
+        A file is reported when its size and time of modification stay the same for debounce seconds
+        :param timeout: maximal time of waiting in seconds, wait until files are changed by default
+        :return: sorted names of changed files, empty list if timeout is expired
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            ready = []
+            for name, (signature, changed_at) in list(self.pending.items()):
+                current = self.__signature(name)
+                if current is None:  # removed and temporary files are not converted
+                    self.pending.pop(name)
+                elif current != signature:
+                    self.pending[name] = (current, now)
+                elif now - changed_at >= self.debounce:
+                    self.pending.pop(name)
+                    ready.append(name)
+            if len(ready) > 0:
+                return sorted(ready)
+            if deadline is not None and now >= deadline:
+                return []
+            if len(self.pending) > 0:  # pending files are checked several times per debounce delay
+                interval = self.debounce / 5
+            elif self.fd is None:
+                interval = self.poll_interval
+            else:
+                interval = None
+            if deadline is not None:
+                remaining = max(0.0, deadline - now)
+                interval = remaining if interval is None else min(interval, remaining)
+            for name in self.__changed(interval):
+                self.pending[name] = (self.__signature(name), time.monotonic())